@@ -1,33 +1,93 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import random
-import copy
 import io
+import os
+import time
+import logging
+import cProfile
+import pstats
+import tracemalloc
+import json
+import hashlib
+import tempfile
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property
 import matplotlib.pyplot as plt
 from fpdf import FPDF
 
 
 #Isaac
-@st.cache_data
+DB_PATH = "Smart_System_db.xlsx"
+
 def load_and_filter_data(excluded_categories):
     """
-    Loads the Excel database and removes excluded food categories.
+    Loads the meal database (once per process) and removes excluded food categories.
+    """
+    return split_catalog(load_catalog(), excluded_categories)
+
+@st.cache_resource
+def load_catalog():
+    """The full catalog, shared by every session; exclusions are applied later as masks."""
+    return read_catalog()
+
+def compiled_path(path):
+    """Compiled columnar twin of an Excel database (written by create_db.py)."""
+    return os.path.splitext(path)[0] + ".npz"
+
+def read_catalog(path=DB_PATH):
     """
+    Reads the full meal database without Streamlit caching (empty DataFrame if missing).
+    Prefers the compiled .npz bundle when it is at least as new as the Excel file;
+    .csv / .parquet catalogs (e.g. synthetic ones from create_db.py) are read directly.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.parquet'):
+        try:
+            return pd.read_csv(path) if ext == '.csv' else pd.read_parquet(path)
+        except FileNotFoundError:
+            return pd.DataFrame()
+    npz = compiled_path(path)
+    if os.path.exists(npz) and (not os.path.exists(path) or os.path.getmtime(npz) >= os.path.getmtime(path)):
+        return read_compiled_catalog(npz)
     try:
-        df = pd.read_excel("Smart_System_db.xlsx")
+        return pd.read_excel(path)
     except FileNotFoundError:
+        return pd.DataFrame()
+
+def read_compiled_catalog(path):
+    """
+    Loads the .npz bundle: plain arrays for Name/Cal/Price and categorical codes + labels
+    for Type/Category (no openpyxl, no pickle).
+    """
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({
+            'Name': data['name'],
+            'Type': pd.Categorical.from_codes(data['type_codes'], data['type_labels']),
+            'Category': pd.Categorical.from_codes(data['category_codes'], data['category_labels']),
+            'Cal': data['cal'],
+            'Price': data['price'],
+        })
+
+def split_catalog(df, excluded_categories):
+    """Applies the category exclusions and segments the catalog by meal type (boolean masks)."""
+    if df.empty:
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
     # Apply constraint filtering (Hard Constraints)
-    if excluded_categories:
-        df = df[~df['Category'].isin(excluded_categories)]
+    keep = ~df['Category'].isin(excluded_categories) if excluded_categories else True
 
     # Segment data by meal type
-    return (
-        df[df['Type'] == 'Breakfast'],
-        df[df['Type'] == 'Lunch'],
-        df[df['Type'] == 'Dinner']
-    )
+    types = df['Type']
+    return tuple(df[keep & (types == meal)] for meal in MEAL_TYPES)
+
+ENGINE_CHOICES = {
+    "Genetic Algorithm": 'ga',
+    "Dynamic Programming": 'exact',  # engine id kept for cached results and job requests
+    "Pareto Front (NSGA-II)": 'pareto',
+}
 
 def render_sidebar():
     """
@@ -40,6 +100,8 @@ def render_sidebar():
     with st.sidebar.expander("Optimization Targets", expanded=True):
         budget = st.number_input("Weekly Budget (EGP)", 500, 10000, 3000, step=100)
         daily_cal = st.number_input("Target Daily Calories", 1200, 5000, 2500, step=50)
+        n_days = st.selectbox("Planning Horizon", HORIZONS, format_func=lambda n: f"{n} days",
+                              help="The weekly budget is scaled to the horizon.")
 
     # 2. Constraints
     with st.sidebar.expander("Dietary Constraints", expanded=True):
@@ -50,154 +112,1581 @@ def render_sidebar():
     with st.sidebar.expander("Algorithm Settings", expanded=False):
         generations = st.slider("Generations", 50, 400, 150)
         pop_size = st.slider("Population Size", 50, 300, 100)
-        
-    return budget, daily_cal, excluded, generations, pop_size
+        vectorized = st.checkbox("Vectorized Engine (NumPy)", value=False)
+        islands = st.slider("Parallel Islands (CPU cores)", 1, max(2, os.cpu_count() or 1), 1,
+                            help="Runs independent populations on several cores and migrates their elites.")
+        engine = st.selectbox("Engine", list(ENGINE_CHOICES),
+                              help="Dynamic Programming falls back to the GA when the catalog is too large. "
+                                   "Pareto returns the closer-to-budget vs. closer-to-calories alternatives of one run.")
+        seed = st.number_input("Random Seed", 0, 2**31 - 1, 42,
+                               help="Same inputs and seed give the same plan (served from the result cache).")
+        warm = st.slider("Warm Start (% of population from past plans)", 0, 50, int(WARM_FRACTION * 100),
+                         help="Seeds the first generation with the best plans of the nearest earlier requests.")
+        stall = st.slider("Stop after N stalled generations (0 = off)", 0, 200, 0)
+        time_budget = st.number_input("Time Budget (ms, 0 = off)", 0, 600000, 0, step=500)
+        profile = st.checkbox("Profile this run (cProfile + tracemalloc)", value=False)
+
+    ga_options = {
+        'vectorized': vectorized,
+        'islands': islands,
+        'stall_generations': stall or None,
+        'time_budget_ms': time_budget or None,
+        'warm_fraction': warm / 100,
+    }
+    return budget, daily_cal, n_days, excluded, generations, pop_size, engine, int(seed), ga_options, profile
 
 
 # Shaheen 
+MEAL_TYPES = ('Breakfast', 'Lunch', 'Dinner')
+DEFAULT_DAYS = 7
+HORIZONS = (7, 14, 30, 90)  # planning horizons offered in the UI (days)
+
+class DayGene(Mapping):
+    """
+    Immutable day of a schedule: read-only {'Breakfast', 'Lunch', 'Dinner'} -> catalog row.
+    Day genes are shared between parents and children, so they are replaced, never edited.
+    Each gene carries its cost/calorie totals and lunch name, so schedules are re-scored
+    without touching the rows (MealCatalog.day fills them from its arrays).
+    """
+    __slots__ = ('_meals', 'cost', 'cal', 'lunch')
+
+    def __init__(self, breakfast, lunch, dinner, cost=None, cal=None, lunch_name=None):
+        meals = (breakfast, lunch, dinner)
+        object.__setattr__(self, '_meals', meals)
+        object.__setattr__(self, 'cost', sum(m['Price'] for m in meals) if cost is None else cost)
+        object.__setattr__(self, 'cal', sum(m['Cal'] for m in meals) if cal is None else cal)
+        object.__setattr__(self, 'lunch', lunch['Name'] if lunch_name is None else lunch_name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DayGene is immutable")
+
+    def __getitem__(self, meal):
+        try:
+            return self._meals[MEAL_TYPES.index(meal)]
+        except ValueError:
+            raise KeyError(meal) from None
+
+    def __iter__(self):
+        return iter(MEAL_TYPES)
+
+    def __len__(self):
+        return 3
+
+
 class WeeklySchedule:
     """
-    Represents a single solution (Chromosome) in the population.
+    Represents a single solution (Chromosome) in the population: one DayGene per day of the
+    horizon (a week by default, any n_days).
     Contains logic for 'Smart Sampling' based on user goals (Heavy vs Light).
     """
-    def __init__(self, b_df, l_df, d_df, goal_type='standard', days=None):
+    def __init__(self, b_df, l_df, d_df, goal_type='standard', days=None, sampler=None, n_days=DEFAULT_DAYS):
         self.b_df = b_df
         self.l_df = l_df
         self.d_df = d_df
         self.goal_type = goal_type  # 'heavy', 'light', or 'standard'
+        # Shared across the population; build one per catalog and pass it in.
+        self.sampler = sampler or MealSampler(MealCatalog(b_df, l_df, d_df))
         
         # If days are passed (from crossover), use them. Else, generate new.
         if days:
             self.days = days
         else:
-            self.days = [self._generate_day() for _ in range(7)]
+            self.days = [self._generate_day() for _ in range(n_days)]
         
         # Metrics placeholders
         self.fitness = 0
-        self.total_cost = 0
-        self.total_cal = 0
         self.accuracy = 0.0
+        # Totals are kept up to date from the day genes; the score only when dirty
+        self.dirty = True
+        self._targets = None
+        self._update_totals()
 
-    def _get_smart_sample(self, df):
+    def _get_smart_sample(self, meal_idx):
         """
         Heuristic: Selects meals based on calorie density goals.
         - If Heavy Goal: Picks from top 50% calorie items.
         - If Light Goal: Picks from bottom 50% calorie items.
+        The pools themselves are precomputed by the shared MealSampler; returns a row index.
         """
-        if df.empty: return None
-
-        if self.goal_type == 'heavy':
-            limit = df['Cal'].quantile(0.5)
-            subset = df[df['Cal'] >= limit]
-            return subset.sample(1).iloc[0] if not subset.empty else df.sample(1).iloc[0]
-            
-        elif self.goal_type == 'light':
-            limit = df['Cal'].quantile(0.5)
-            subset = df[df['Cal'] <= limit]
-            return subset.sample(1).iloc[0] if not subset.empty else df.sample(1).iloc[0]
-            
-        return df.sample(1).iloc[0]
+        return self.sampler.sample_index(self.goal_type, meal_idx)
 
     def _generate_day(self):
         """Creates a full day plan using smart sampling."""
         if self.b_df.empty or self.l_df.empty or self.d_df.empty: return None
-        return {
-            'Breakfast': self._get_smart_sample(self.b_df),
-            'Lunch': self._get_smart_sample(self.l_df),
-            'Dinner': self._get_smart_sample(self.d_df)
-        }
+        return self.sampler.catalog.day(*(self._get_smart_sample(m) for m in range(3)))
+
+    def _update_totals(self):
+        """Full recount from the day genes' cached totals (no row access)."""
+        if not self.days or None in self.days:
+            self.total_cost = self.total_cal = self.lunch_repeats = 0
+            return
+        self.total_cost = sum(d.cost for d in self.days)
+        self.total_cal = sum(d.cal for d in self.days)
+        self.lunch_repeats = sum(a.lunch == b.lunch for a, b in zip(self.days, self.days[1:]))
+
+    def replace_day(self, idx, day):
+        """Swaps one day gene, updating totals and the lunch-repeat count for that day only."""
+        old = self.days[idx]
+        self.days[idx] = day
+        self.dirty = True
+        if old is None or None in self.days:
+            self._update_totals()
+            return
+        self.total_cost += day.cost - old.cost
+        self.total_cal += day.cal - old.cal
+        for left, right in ((idx - 1, idx), (idx, idx + 1)):
+            if left >= 0 and right < len(self.days):
+                before = (old if left == idx else self.days[left]).lunch == (old if right == idx else self.days[right]).lunch
+                self.lunch_repeats += (self.days[left].lunch == self.days[right].lunch) - before
+
+    def objectives(self, target_budget, target_cal):
+        """Pareto-mode objectives (see OBJECTIVES), all minimized; read from the cached totals."""
+        return (abs(target_budget - self.total_cost) / target_budget, abs(target_cal - self.total_cal) / target_cal,
+                self.lunch_repeats)
 
     def calculate_fitness(self, target_budget, target_cal):
         """
         Objective Function: Calculates how good this schedule is.
         Maximizes accuracy by minimizing the weighted error.
+        Clean schedules (e.g. carried-over elites) return their cached score.
         """
         if not self.days or None in self.days:
             self.fitness = -99999
             return -99999
 
-        # Summation
-        self.total_cost = sum(d['Breakfast']['Price'] + d['Lunch']['Price'] + d['Dinner']['Price'] for d in self.days)
-        self.total_cal = sum(d['Breakfast']['Cal'] + d['Lunch']['Cal'] + d['Dinner']['Cal'] for d in self.days)
-        
+        if not self.dirty and self._targets == (target_budget, target_cal):
+            return self.fitness
+
         # Normalized Error (Percentage)
         cost_err = abs(target_budget - self.total_cost) / target_budget
         cal_err = abs(target_cal - self.total_cal) / target_cal
         
         # Soft Constraint: Penalize repeated lunches
-        variety_penalty = sum(0.05 for i in range(6) if self.days[i]['Lunch']['Name'] == self.days[i+1]['Lunch']['Name'])
+        variety_penalty = 0.05 * self.lunch_repeats
 
         # Final Score (Weighted: 50% Cost, 50% Calories)
         total_error = (cost_err * 0.5) + (cal_err * 0.5) + variety_penalty
         
         self.fitness = -total_error
         self.accuracy = max(0, 100 * (1 - total_error))
+        self.dirty = False
+        self._targets = (target_budget, target_cal)
         return self.fitness
 
 
+class MealCatalog:
+    """
+    Array view of the filtered meal tables for the vectorized engine.
+    A gene is the positional row index of a meal inside its meal-type table,
+    so a plan is n_days * 3 ints laid out as [day0_b, day0_l, day0_d, day1_b, ...] (21 for a week).
+    """
+    def __init__(self, b_df, l_df, d_df):
+        self.frames = (b_df, l_df, d_df)
+        self.price = tuple(df['Price'].to_numpy() for df in self.frames)
+        self.cal = tuple(df['Cal'].to_numpy() for df in self.frames)
+        # Lunch names as integer codes, so the variety check is an int compare
+        self.lunch_codes = pd.factorize(l_df['Name'])[0]
+        self.lunch_names = l_df['Name'].to_numpy()
+        self._rows = ({}, {}, {})
+
+    @property
+    def empty(self):
+        return any(df.empty for df in self.frames)
+
+    @cached_property
+    def content_hash(self):
+        """sha256 over the filtered tables' contents, for cache keys."""
+        h = hashlib.sha256()
+        for df in self.frames:
+            h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        return h.hexdigest()
+
+    def row(self, meal_idx, i):
+        """Catalog row as a Series, materialized on first use and shared afterwards."""
+        rows = self._rows[meal_idx]
+        if i not in rows:
+            rows[i] = self.frames[meal_idx].iloc[i]
+        return rows[i]
+
+    def day(self, b, l, d):
+        """DayGene for three row indices, with its totals read from the arrays."""
+        return DayGene(self.row(0, b), self.row(1, l), self.row(2, d),
+                       cost=self.price[0][b] + self.price[1][l] + self.price[2][d],
+                       cal=self.cal[0][b] + self.cal[1][l] + self.cal[2][d],
+                       lunch_name=self.lunch_names[l])
+
+    def days_from_genes(self, genes):
+        """Decodes a flat gene array into a list of DayGene."""
+        return [self.day(b, l, d) for b, l, d in np.asarray(genes).reshape(-1, 3).tolist()]
+
+    def genes_from_schedule(self, schedule):
+        """Encodes a WeeklySchedule of pandas rows as a flat int gene array."""
+        return np.array([
+            df.index.get_loc(day[meal].name)
+            for day in schedule.days
+            for meal, df in zip(MEAL_TYPES, self.frames)
+        ], dtype=np.int32)
+
+    def schedule_from_genes(self, genes, goal_type='standard', sampler=None):
+        """Decodes a flat gene array back into a WeeklySchedule."""
+        b_df, l_df, d_df = self.frames
+        return WeeklySchedule(b_df, l_df, d_df, goal_type=goal_type,
+                              days=self.days_from_genes(genes), sampler=sampler or MealSampler(self))
+
+
+class MealSampler:
+    """
+    Smart Sampling pools precomputed once per filtered catalog.
+    Holds the heavy/light/standard row-index pools of every meal type and draws
+    from them in batches with a (seedable) numpy Generator.
+    """
+    GOALS = ('heavy', 'light', 'standard')
+
+    def __init__(self, catalog, seed=None, batch_size=512):
+        self.catalog = catalog
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.pools = {goal: [self._build_pool(cal, goal) for cal in catalog.cal] for goal in self.GOALS}
+        self._buffers = {}  # (goal, meal_idx) -> [pre-drawn indices, read position]
+
+    @staticmethod
+    def _build_pool(cal, goal):
+        if len(cal) == 0:
+            return np.arange(0)
+        if goal == 'heavy':
+            pool = np.flatnonzero(cal >= np.quantile(cal, 0.5))
+        elif goal == 'light':
+            pool = np.flatnonzero(cal <= np.quantile(cal, 0.5))
+        else:
+            pool = np.arange(len(cal))
+        return pool if len(pool) else np.arange(len(cal))
+
+    def draw(self, goal, meal_idx, n):
+        """Draws n row indices of one meal type for the given goal."""
+        return self.rng.choice(self.pools[goal][meal_idx], size=n)
+
+    def sample_index(self, goal, meal_idx):
+        """Single draw served from a pre-drawn batch."""
+        buf = self._buffers.get((goal, meal_idx))
+        if buf is None or buf[1] >= len(buf[0]):
+            buf = self._buffers[(goal, meal_idx)] = [self.draw(goal, meal_idx, self.batch_size), 0]
+        buf[1] += 1
+        return int(buf[0][buf[1] - 1])
+
+    def draw_genes(self, goal, n_rows, n_days=DEFAULT_DAYS):
+        """Draws a whole (n_rows, n_days * 3) gene matrix in one call."""
+        genes = np.empty((n_rows, n_days, 3), dtype=np.int32)
+        for m in range(3):
+            genes[:, :, m] = self.draw(goal, m, (n_rows, n_days))
+        return genes.reshape(n_rows, n_days * 3)
+
+
+def population_totals(genes, catalog):
+    """(total_cost, total_cal, lunch_repeats) arrays for a (pop_size, n_days * 3) gene matrix."""
+    g = genes.reshape(len(genes), -1, 3)
+    total_cost = sum(catalog.price[m][g[:, :, m]].sum(axis=1) for m in range(3))
+    total_cal = sum(catalog.cal[m][g[:, :, m]].sum(axis=1) for m in range(3))
+    lunches = catalog.lunch_codes[g[:, :, 1]]
+    return total_cost, total_cal, (lunches[:, :-1] == lunches[:, 1:]).sum(axis=1)
+
+def evaluate_population(genes, catalog, target_budget, target_cal):
+    """
+    Vectorized twin of WeeklySchedule.calculate_fitness for a whole population.
+    Takes a (pop_size, n_days * 3) gene matrix, returns (fitness, total_cost, total_cal) arrays.
+    """
+    total_cost, total_cal, repeats = population_totals(genes, catalog)
+
+    cost_err = np.abs(target_budget - total_cost) / target_budget
+    cal_err = np.abs(target_cal - total_cal) / target_cal
+
+    variety_penalty = 0.05 * repeats
+
+    total_error = (cost_err * 0.5) + (cal_err * 0.5) + variety_penalty
+    return -total_error, total_cost, total_cal
+
+
 # Adam
-def crossover(p1, p2):
-    """Single-point crossover to mix parents."""
-    split = random.randint(1, 6)
-    new_days = p1.days[:split] + p2.days[split:]
-    return WeeklySchedule(p1.b_df, p1.l_df, p1.d_df, goal_type=p1.goal_type, days=copy.deepcopy(new_days))
+def _week_slots(n_days):
+    """Crossover cut points / mutation draws per individual: one per week of the horizon."""
+    return max(1, n_days // 7)
+
+def crossover(p1, p2, rng=random):
+    """
+    Multi-point crossover to mix parents: the child alternates between them at one random
+    day boundary per week (day genes are immutable, so shared, not copied).
+    """
+    n_days = len(p1.days)
+    cuts = sorted(rng.sample(range(1, n_days), min(_week_slots(n_days), n_days - 1))) + [n_days]
+    new_days, start = [], 0
+    for i, cut in enumerate(cuts):
+        new_days.extend((p1, p2)[i % 2].days[start:cut])
+        start = cut
+    return WeeklySchedule(p1.b_df, p1.l_df, p1.d_df, goal_type=p1.goal_type, days=new_days, sampler=p1.sampler)
+
+def mutate(schedule, rng=random):
+    """Randomly regenerates days to maintain diversity (one chance per week of the horizon)."""
+    for _ in range(_week_slots(len(schedule.days))):
+        if rng.random() < 0.2: 
+            day_idx = rng.randrange(len(schedule.days))
+            schedule.replace_day(day_idx, schedule._generate_day())
+
+class StoppingRule:
+    """
+    Convergence and latency criteria for the GA loops (all optional):
+    - stall_generations: best fitness improved by <= tolerance over that many generations.
+    - target_accuracy: best accuracy (%) reached.
+    - time_budget_ms: wall-clock deadline since the rule was created; the best-so-far is returned.
+    check(history) returns the stop reason, or None to keep going.
+    """
+    def __init__(self, stall_generations=None, tolerance=1e-6, target_accuracy=None, time_budget_ms=None):
+        self.stall_generations = stall_generations
+        self.tolerance = tolerance
+        self.target_accuracy = target_accuracy
+        self.time_budget_ms = time_budget_ms
+        self.start = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def remaining_ms(self):
+        return None if self.time_budget_ms is None else max(0.0, self.time_budget_ms - self.elapsed_ms())
+
+    def check(self, history):
+        if self.target_accuracy is not None and 100 * (1 + history[-1]) >= self.target_accuracy:
+            return 'target_accuracy'
+        if (self.stall_generations and len(history) > self.stall_generations
+                and history[-1] - history[-1 - self.stall_generations] <= self.tolerance):
+            return 'stalled'
+        if self.time_budget_ms is not None and self.elapsed_ms() >= self.time_budget_ms:
+            return 'time_budget'
+        return None
 
-def mutate(schedule):
-    """Randomly regenerates a day to maintain diversity."""
-    if random.random() < 0.2: 
-        day_idx = random.randint(0, 6)
-        schedule.days[day_idx] = schedule._generate_day()
+def _finish(best, stop, reason, history):
+    """Attaches the stop report to the returned schedule."""
+    best.stop_reason = reason or 'generations'
+    best.stopped_at = len(history)
+    best.execution_time = stop.elapsed_ms() / 1000
+    return best
 
-def run_genetic_algorithm(b_df, l_df, d_df, budget, cal_target, pop_size, generations, p_bar, status_txt):
+GA_PHASES = ('init', 'evaluate', 'sort', 'reproduce', 'mutate')
+
+class GAObserver:
+    """
+    Observer interface for the GA loops: pass instances via run_genetic_algorithm(observers=[...]).
+    on_generation receives a stats dict with gen, generations, best_fitness, best_accuracy,
+    mean_fitness, diversity (share of distinct plans) and phases (seconds per GA_PHASES step).
+    mean_fitness and diversity cost a pass (diversity a sort) over the population every generation,
+    so they are only computed when an attached observer sets wants_population_stats; else None.
+    """
+    wants_population_stats = False
+
+    def on_start(self, info):
+        """info: engine, pop_size, generations, goal."""
+
+    def on_generation(self, stats):
+        pass
+
+    def on_finish(self, best, history):
+        pass
+
+
+class StreamlitProgress(GAObserver):
+    """Built-in sink: drives an st.progress bar and status text about ten times per run."""
+    def __init__(self, p_bar=None, status_txt=None):
+        self.p_bar = p_bar
+        self.status_txt = status_txt
+        self._last = None
+
+    def on_generation(self, stats):
+        gen, generations = stats['gen'], stats['generations']
+        if self._last is not None and gen - self._last < max(1, generations // 10) and gen + 1 < generations:
+            return
+        self._last = gen
+        if self.p_bar is not None:
+            self.p_bar.progress(min(1.0, (gen + 1) / generations))
+        if self.status_txt is not None:
+            self.status_txt.text(f"Gen {gen+1}: Accuracy {stats['best_accuracy']:.1f}%")
+
+
+class LoggingObserver(GAObserver):
+    """Built-in sink: one structured (JSON) record per `every` generations on a logger."""
+    wants_population_stats = True
+
+    def __init__(self, logger=None, every=1, level=logging.INFO):
+        self.logger = logger or logging.getLogger("smart_nutrition.ga")
+        self.every = every
+        self.level = level
+
+    def on_start(self, info):
+        self.logger.log(self.level, json.dumps({'event': 'start', **info}))
+
+    def on_generation(self, stats):
+        if stats['gen'] % self.every == 0:
+            self.logger.log(self.level, json.dumps({'event': 'generation', **stats}))
+
+    def on_finish(self, best, history):
+        self.logger.log(self.level, json.dumps({
+            'event': 'finish', 'best_fitness': float(best.fitness), 'accuracy': float(best.accuracy),
+            'generations_run': len(history), 'stop_reason': getattr(best, 'stop_reason', None),
+        }))
+
+
+class ProfilingObserver(GAObserver):
+    """
+    Built-in sink: profiles a single run with cProfile and/or tracemalloc.
+    Afterwards .report holds the top `limit` functions and .peak_memory_mb the traced peak.
+    """
+    def __init__(self, cprofile=True, trace_memory=True, sort='cumulative', limit=25):
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.sort = sort
+        self.limit = limit
+        self.report = ""
+        self.peak_memory_mb = None
+        self._profiler = None
+        self._owns_tracing = False
+
+    def on_start(self, info):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        if self.cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def on_finish(self, best, history):
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats(self.sort).print_stats(self.limit)
+            self.report = out.getvalue()
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        self.close()
+
+    def close(self):
+        """Stops profiling and the tracing this observer started; safe to call again, or after a failed run."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._owns_tracing = False
+
+
+class _Monitor:
+    """Fans GA loop events out to the observers and accumulates per-phase wall time."""
+    def __init__(self, observers, info):
+        self.observers = [obs for obs in observers or () if obs is not None]
+        self.population_stats = any(getattr(obs, 'wants_population_stats', False) for obs in self.observers)
+        self.phases = dict.fromkeys(GA_PHASES, 0.0)
+        self.totals = dict.fromkeys(GA_PHASES, 0.0)
+        for obs in self.observers:
+            obs.on_start(info)
+
+    def lap(self, phase, since):
+        """Books the time since `since` to a phase; returns now, for chaining."""
+        now = time.perf_counter()
+        self.phases[phase] += now - since
+        self.totals[phase] += now - since
+        return now
+
+    def generation(self, gen, generations, best_fitness, fitness=None, diversity=None):
+        """fitness and diversity may be callables; they are only evaluated for population stats."""
+        if self.observers:
+            stats = {
+                'gen': gen, 'generations': generations,
+                'best_fitness': float(best_fitness), 'best_accuracy': max(0.0, 100 * (1 + float(best_fitness))),
+                'mean_fitness': None, 'diversity': None,
+                'phases': dict(self.phases),
+            }
+            if self.population_stats:
+                fitness = fitness() if callable(fitness) else fitness
+                stats['mean_fitness'] = None if fitness is None else float(np.mean(fitness))
+                stats['diversity'] = diversity() if callable(diversity) else diversity
+            for obs in self.observers:
+                obs.on_generation(stats)
+        self.phases = dict.fromkeys(GA_PHASES, 0.0)
+
+    def finish(self, best, history):
+        for obs in self.observers:
+            obs.on_finish(best, history)
+        return best
+
+def detect_goal(cal_target, n_days=DEFAULT_DAYS):
+    """Heuristic: Determine user goal type automatically from the calorie target of the horizon."""
+    daily_target = cal_target / n_days
+    return 'heavy' if daily_target > 2800 else 'light' if daily_target < 1800 else 'standard'
+
+def _seed_head(population, initial_genes):
+    """Overwrites the first rows of a drawn gene matrix with warm-start plans (see WarmStartStore)."""
+    if initial_genes is not None and len(initial_genes):
+        n = min(len(initial_genes), len(population))
+        population[:n] = initial_genes[:n]
+    return population
+
+def run_genetic_algorithm(b_df, l_df, d_df, budget, cal_target, pop_size, generations, p_bar=None, status_txt=None,
+                          vectorized=False, islands=1, seed=None, stall_generations=None, tolerance=1e-6,
+                          target_accuracy=None, time_budget_ms=None, observers=None, n_days=DEFAULT_DAYS,
+                          initial_genes=None, islands_in_process=False):
     """
     The Main Optimization Loop.
-    1. Heuristic Initialization (Determine Heavy/Light goal).
+    1. Heuristic Initialization (Determine Heavy/Light goal); initial_genes (a gene matrix,
+       e.g. from WarmStartStore.seed_genes) replace the first rows of the random population.
     2. Evolution over generations.
+    Progress goes to `observers` (GAObserver); p_bar / status_txt are a shortcut for StreamlitProgress.
+    With vectorized=True the population is evolved as one int gene matrix (see MealCatalog);
+    islands > 1 runs the parallel island model instead (see run_island_model; islands_in_process
+    evolves the islands in this process, for callers that are already a pool worker).
+    A fixed seed makes the run reproducible. budget and cal_target cover the whole n_days horizon.
+    Stops early on stall / target accuracy / time budget (see StoppingRule); the returned schedule
+    reports stop_reason, stopped_at (generations run) and execution_time (seconds).
     """
-    # Heuristic: Determine user goal type automatically
-    daily_target = cal_target / 7
-    goal = 'heavy' if daily_target > 2800 else 'light' if daily_target < 1800 else 'standard'
+    goal = detect_goal(cal_target, n_days)
+    stop = StoppingRule(stall_generations, tolerance, target_accuracy, time_budget_ms)
+    observers = list(observers or [])
+    if p_bar is not None or status_txt is not None:
+        observers.append(StreamlitProgress(p_bar, status_txt))
+    info = {'engine': 'islands' if islands > 1 else 'vectorized' if vectorized else 'object',
+            'pop_size': pop_size, 'generations': generations, 'goal': goal, 'n_days': n_days}
+
+    if islands > 1:
+        return run_island_model(b_df, l_df, d_df, budget, cal_target, pop_size, generations,
+                                n_islands=islands, seed=seed, stop=stop, observers=observers, n_days=n_days,
+                                initial_genes=initial_genes, in_process=islands_in_process)
+
+    monitor = _Monitor(observers, info)
+    tick = time.perf_counter()
+    catalog = MealCatalog(b_df, l_df, d_df)
+    sampler = MealSampler(catalog, seed=seed)
+    rng = random.Random(seed)
+    if vectorized:
+        return _run_vectorized_ga(sampler, goal, budget, cal_target, pop_size, generations, stop, monitor, tick,
+                                  n_days, initial_genes)
     
-    # Initialize Population
-    population = [WeeklySchedule(b_df, l_df, d_df, goal_type=goal) for _ in range(pop_size)]
+    # Initialize Population (all genes drawn in one batch)
+    if catalog.empty:
+        population = [WeeklySchedule(b_df, l_df, d_df, goal_type=goal, sampler=sampler, n_days=n_days)
+                      for _ in range(pop_size)]
+    else:
+        population = [
+            WeeklySchedule(b_df, l_df, d_df, goal_type=goal, days=catalog.days_from_genes(genes), sampler=sampler)
+            for genes in _seed_head(sampler.draw_genes(goal, pop_size, n_days), initial_genes)
+        ]
+    monitor.lap('init', tick)
     history = []
+    reason = None
+
+    def diversity():
+        plans = {tuple(id(day[meal]) for day in ind.days for meal in MEAL_TYPES) for ind in population}
+        return len(plans) / len(population)
     
     for gen in range(generations):
         # Evaluation
+        tick = time.perf_counter()
         for ind in population:
             ind.calculate_fitness(budget, cal_target)
+        tick = monitor.lap('evaluate', tick)
         
         # Selection (Sort best first)
         population.sort(key=lambda x: x.fitness, reverse=True)
         history.append(population[0].fitness)
-        
-        # UI Feedback
-        if gen % (generations // 10) == 0:
-            p_bar.progress((gen + 1) / generations)
-            status_txt.text(f"Gen {gen+1}: Accuracy {population[0].accuracy:.1f}%")
-
-        # Reproduction (Elitism + Breeding)
-        next_gen = population[:10] # Keep top 10
-        while len(next_gen) < pop_size:
-            p1, p2 = random.choice(population[:20]), random.choice(population[:20])
-            child = crossover(p1, p2)
-            mutate(child)
-            next_gen.append(child)
+        monitor.lap('sort', tick)
+
+        reason = stop.check(history)
+        if not reason:
+            # Reproduction (Elitism + Breeding)
+            next_gen = population[:10] # Keep top 10
+            while len(next_gen) < pop_size:
+                tick = time.perf_counter()
+                p1, p2 = rng.choice(population[:20]), rng.choice(population[:20])
+                child = crossover(p1, p2, rng)
+                tick = monitor.lap('reproduce', tick)
+                mutate(child, rng)
+                monitor.lap('mutate', tick)
+                next_gen.append(child)
+
+        if monitor.observers:
+            monitor.generation(gen, generations, history[-1], lambda: [ind.fitness for ind in population],
+                               diversity)
+        if reason:
+            break
         population = next_gen
         
-    return population[0], history
+    best = _finish(population[0], stop, reason, history)
+    return monitor.finish(best, history), history
+
+def _run_vectorized_ga(sampler, goal, budget, cal_target, pop_size, generations, stop, monitor, tick,
+                       n_days=DEFAULT_DAYS, initial_genes=None):
+    """Same elitist GA as run_genetic_algorithm, on a (pop_size, n_days * 3) gene matrix."""
+    population = _seed_head(sampler.draw_genes(goal, pop_size, n_days), initial_genes)
+    monitor.lap('init', tick)
+    population, history, reason = _evolve_genes(population, sampler, goal, budget, cal_target, generations,
+                                                stop, monitor)
+
+    best = sampler.catalog.schedule_from_genes(population[0], goal_type=goal, sampler=sampler)
+    best.calculate_fitness(budget, cal_target)
+    return monitor.finish(_finish(best, stop, reason, history), history), history
+
+def _evolve_genes(population, sampler, goal, budget, cal_target, generations, stop=None, monitor=None,
+                  n_elite=10, n_parents=20, mutation_rate=0.2):
+    """
+    Evolves a gene matrix for a number of generations (or until the StoppingRule fires).
+    Returns the new population (its first n_elite rows are the sorted elites), the best-fitness
+    history and the stop reason (None if all generations ran).
+    """
+    catalog, rng = sampler.catalog, sampler.rng
+    monitor = monitor or _Monitor(None, {})
+    pop_size = len(population)
+    n_elite, n_parents = min(n_elite, pop_size), min(n_parents, pop_size)
+    n_children = pop_size - n_elite
+    history = []
+    reason = None
+
+    for gen in range(generations):
+        # Evaluation + Selection (stable sort, best first)
+        tick = time.perf_counter()
+        fitness, _, _ = evaluate_population(population, catalog, budget, cal_target)
+        tick = monitor.lap('evaluate', tick)
+        order = np.argsort(-fitness, kind='stable')
+        population = population[order]
+        history.append(float(fitness[order[0]]))
+        tick = monitor.lap('sort', tick)
+
+        reason = stop.check(history) if stop else None
+        if monitor.observers:
+            monitor.generation(gen, generations, history[-1], fitness,
+                               lambda: len(np.unique(population, axis=0)) / pop_size)
+        if reason:
+            break
+
+        if n_children <= 0:
+            continue
+
+        # Breeding + mutation
+        tick = time.perf_counter()
+        p1 = population[rng.integers(0, n_parents, n_children)]
+        p2 = population[rng.integers(0, n_parents, n_children)]
+        children = _crossover_genes(p1, p2, rng)
+        tick = monitor.lap('reproduce', tick)
+        _mutate_genes(children, sampler, goal, mutation_rate)
+
+        population = np.vstack([population[:n_elite], children])
+        monitor.lap('mutate', tick)
+
+    return population, history, reason
+
+def _crossover_genes(p1, p2, rng):
+    """
+    Multi-point crossover on day boundaries (one cut per week) for two parent matrices;
+    a cumulative sum of the cut markers says which parent each day comes from, linear in n_days.
+    """
+    n_children, n_days = len(p1), p1.shape[1] // 3
+    if n_days < 2:
+        return p1.copy()  # no day boundary to cut at
+    cuts = np.zeros((n_children, n_days), dtype=np.int32)
+    np.put_along_axis(cuts, rng.integers(1, n_days, (n_children, _week_slots(n_days))), 1, axis=1)
+    from_p2 = np.repeat(np.cumsum(cuts, axis=1) % 2 == 1, 3, axis=1)
+    return np.where(from_p2, p2, p1)
+
+def _mutate_genes(children, sampler, goal, mutation_rate=0.2):
+    """In place: regenerates random days of the children (one chance per week)."""
+    n_days = children.shape[1] // 3
+    n_slots = _week_slots(n_days)
+    hit = np.flatnonzero(sampler.rng.random((len(children), n_slots)) < mutation_rate) // n_slots
+    if len(hit):
+        day = sampler.rng.integers(0, n_days, len(hit))
+        fresh = sampler.draw_genes(goal, len(hit), 1)
+        for m in range(3):
+            children[hit, day * 3 + m] = fresh[:, m]
+
+
+# Island model: worker processes keep one sampler for the catalog they were started with.
+_ISLAND_SAMPLER = None
+
+def _init_island_worker(b_df, l_df, d_df):
+    global _ISLAND_SAMPLER
+    _ISLAND_SAMPLER = MealSampler(MealCatalog(b_df, l_df, d_df))
+
+def _evolve_island(population, seed_key, goal, budget, cal_target, pop_size, generations, target_accuracy,
+                   time_budget_ms, n_days=DEFAULT_DAYS, initial_genes=None):
+    """
+    Worker task: one epoch of one island (draws the island's population on the first epoch,
+    headed by its share of the warm-start plans).
+    Returns (population, history, stop reason, seconds per GA phase).
+    """
+    sampler = _ISLAND_SAMPLER
+    sampler.rng = np.random.default_rng(seed_key)
+    monitor = _Monitor(None, {})
+    tick = time.perf_counter()
+    if population is None:
+        population = _seed_head(sampler.draw_genes(goal, pop_size, n_days), initial_genes)
+        monitor.lap('init', tick)
+    stop = StoppingRule(target_accuracy=target_accuracy, time_budget_ms=time_budget_ms)
+    population, history, reason = _evolve_genes(population, sampler, goal, budget, cal_target, generations,
+                                                stop, monitor)
+    return population, history, reason, monitor.totals
+
+def run_island_model(b_df, l_df, d_df, budget, cal_target, pop_size, generations, n_islands=None,
+                     migration_interval=25, n_migrants=2, seed=None, p_bar=None, status_txt=None, stop=None,
+                     observers=None, n_days=DEFAULT_DAYS, initial_genes=None, in_process=False):
+    """
+    Island-model GA across CPU cores.
+    n_islands independent vectorized populations (pop_size each, own seed) evolve in a process pool.
+    Every migration_interval generations the top n_migrants of each island replace the tail of the
+    next island (ring). Returns the global best and the best fitness across islands per generation.
+    A StoppingRule is honoured inside each epoch (target, deadline) and on the merged history (stall).
+    Observers get one stats record per epoch (phases summed over the islands).
+    Warm-start initial_genes are dealt round-robin to the islands.
+    in_process=True evolves the islands one after another on a single thread instead of a process
+    pool (same results), so a caller that is itself a pool worker does not multiply the processes.
+    """
+    stop = stop or StoppingRule()
+    n_islands = n_islands or os.cpu_count() or 1
+    goal = detect_goal(cal_target, n_days)
+    observers = list(observers or [])
+    if p_bar is not None or status_txt is not None:
+        observers.append(StreamlitProgress(p_bar, status_txt))
+    monitor = _Monitor(observers, {'engine': 'islands', 'islands': n_islands, 'pop_size': pop_size,
+                                   'generations': generations, 'goal': goal, 'n_days': n_days})
+    catalog = MealCatalog(b_df, l_df, d_df)
+    base_seed = np.random.SeedSequence(seed).entropy
+
+    populations = [None] * n_islands
+    history = []
+    reason = None
+    if in_process:
+        executor = ThreadPoolExecutor(max_workers=1, initializer=_init_island_worker, initargs=(b_df, l_df, d_df))
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(n_islands, os.cpu_count() or 1),
+                                       initializer=_init_island_worker, initargs=(b_df, l_df, d_df))
+    with executor as pool:
+        for epoch, start in enumerate(range(0, generations, migration_interval)):
+            n_gen = min(migration_interval, generations - start)
+            futures = [
+                pool.submit(_evolve_island, populations[i], [base_seed, i, epoch], goal, budget, cal_target,
+                            pop_size, n_gen, stop.target_accuracy, stop.remaining_ms(), n_days,
+                            None if initial_genes is None or epoch else initial_genes[i::n_islands])
+                for i in range(n_islands)
+            ]
+            results = [f.result() for f in futures]
+            populations = [pop for pop, _, _, _ in results]
+            # Islands that stopped early hold their last value so the histories line up
+            span = max(len(hist) for _, hist, _, _ in results)
+            history.extend(np.max([hist + hist[-1:] * (span - len(hist)) for _, hist, _, _ in results],
+                                  axis=0).tolist())
+            reason = next((r for _, _, r, _ in results if r), None) or stop.check(history)
+
+            # Migration (ring): island i's elites overwrite the last rows of island i+1
+            if n_islands > 1 and not reason and start + n_gen < generations:
+                migrants = [pop[:n_migrants].copy() for pop in populations]
+                for i, pop in enumerate(populations):
+                    pop[-n_migrants:] = migrants[i - 1]
+
+            for phase in GA_PHASES:
+                monitor.phases[phase] = sum(phases[phase] for _, _, _, phases in results)
+            monitor.generation(len(history) - 1, generations, history[-1],
+                               [hist[-1] for _, hist, _, _ in results])
+            if reason:
+                break
+
+    # Global best across the islands' elites
+    elites = np.vstack([pop[:n_migrants or 1] for pop in populations])
+    fitness, _, _ = evaluate_population(elites, catalog, budget, cal_target)
+    best = catalog.schedule_from_genes(elites[int(np.argmax(fitness))], goal_type=goal)
+    best.calculate_fitness(budget, cal_target)
+    return monitor.finish(_finish(best, stop, reason, history), history), history
+
+
+# Pareto mode (NSGA-II): the GA's three error terms as separate objectives, in one run.
+OBJECTIVES = ('cost_error', 'cal_error', 'lunch_repeats')
+
+def evaluate_objectives(genes, catalog, target_budget, target_cal):
+    """
+    Vectorized twin of WeeklySchedule.objectives: a (pop_size, 3) array of OBJECTIVES, all
+    minimized (relative budget error, relative calorie error, consecutive repeated lunches).
+    """
+    total_cost, total_cal, repeats = population_totals(genes, catalog)
+    return np.column_stack([np.abs(target_budget - total_cost) / target_budget,
+                            np.abs(target_cal - total_cal) / target_cal, repeats])
+
+def non_dominated_sort(objectives):
+    """
+    Front number of every row (0 = Pareto front) for a minimization problem.
+    One broadcast builds the whole domination matrix; fronts are then peeled off by
+    subtracting the dominators that were just ranked, with no per-individual loops.
+    """
+    F = np.asarray(objectives, dtype=float)
+    dominates = (F[:, None, :] <= F[None, :, :]).all(-1) & (F[:, None, :] < F[None, :, :]).any(-1)
+    n_dominators = dominates.sum(axis=0)
+    rank = np.full(len(F), -1)
+    front = 0
+    current = n_dominators == 0
+    while current.any():
+        rank[current] = front
+        n_dominators = n_dominators - dominates[current].sum(axis=0)
+        n_dominators[rank >= 0] = -1
+        current = n_dominators == 0
+        front += 1
+    return rank
+
+def crowding_distance(objectives, rank):
+    """
+    NSGA-II crowding distance of every row within its front (boundary rows get inf),
+    computed for all fronts at once: one lexsort by (front, objective) per objective.
+    """
+    F = np.asarray(objectives, dtype=float)
+    distance = np.zeros(len(F))
+    for k in range(F.shape[1]):
+        order = np.lexsort((F[:, k], rank))
+        f, r = F[order, k], rank[order]
+        first = np.r_[True, r[1:] != r[:-1]]
+        last = np.r_[r[1:] != r[:-1], True]
+        front_idx = np.cumsum(first) - 1
+        span = (f[last] - f[first])[front_idx]
+        gap = np.zeros(len(f))
+        gap[1:-1] = f[2:] - f[:-2]
+        d = np.divide(gap, span, out=np.zeros(len(f)), where=span > 0)
+        d[first | last] = np.inf
+        distance[order] += d
+    return distance
+
+def _pareto_fitness(objectives):
+    """The GA's fitness of each row of OBJECTIVES (50/50 budget and calorie error, 0.05 per repeat)."""
+    F = np.asarray(objectives, dtype=float)
+    return -(0.5 * F[:, 0] + 0.5 * F[:, 1] + 0.05 * F[:, 2])
+
+def _pareto_pick(objectives):
+    """
+    Default plan of a Pareto set: the one the GA's weighted fitness prefers, so the dashboard,
+    history and target_accuracy stay comparable with the GA. Returns (index, fitness).
+    """
+    fitness = _pareto_fitness(objectives)
+    idx = int(np.argmax(fitness))
+    return idx, float(fitness[idx])
+
+def _tournament(rank, crowding, n, rng):
+    """Binary tournaments on (lower front, then larger crowding distance); returns n winners."""
+    a, b = rng.integers(0, len(rank), (2, n))
+    a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowding[a] > crowding[b]))
+    return np.where(a_wins, a, b)
+
+def run_pareto_optimizer(b_df, l_df, d_df, budget, cal_target, pop_size, generations, p_bar=None,
+                         status_txt=None, seed=None, stall_generations=None, tolerance=1e-6, target_accuracy=None,
+                         time_budget_ms=None, observers=None, n_days=DEFAULT_DAYS, mutation_rate=0.2,
+                         initial_genes=None):
+    """
+    Multi-objective GA (NSGA-II) over OBJECTIVES instead of the fixed 50/50 weighted error.
+    Each generation breeds pop_size children by tournament selection, then keeps the best
+    pop_size distinct plans of parents + children by (front, crowding distance).
+    Returns the default plan (see _pareto_pick) with, as its .front, every distinct plan of
+    the final Pareto front sorted by cost. history tracks the default plan's GA fitness, so the
+    stopping rule and the learning curve work as for the GA. initial_genes seed the population
+    as in run_genetic_algorithm.
+    """
+    goal = detect_goal(cal_target, n_days)
+    stop = StoppingRule(stall_generations, tolerance, target_accuracy, time_budget_ms)
+    observers = list(observers or [])
+    if p_bar is not None or status_txt is not None:
+        observers.append(StreamlitProgress(p_bar, status_txt))
+    monitor = _Monitor(observers, {'engine': 'pareto', 'pop_size': pop_size, 'generations': generations,
+                                   'goal': goal, 'n_days': n_days})
+    tick = time.perf_counter()
+    catalog = MealCatalog(b_df, l_df, d_df)
+    sampler = MealSampler(catalog, seed=seed)
+    rng = sampler.rng
+
+    population = np.unique(_seed_head(sampler.draw_genes(goal, pop_size, n_days), initial_genes), axis=0)
+    F = evaluate_objectives(population, catalog, budget, cal_target)
+    rank = non_dominated_sort(F)
+    crowding = crowding_distance(F, rank)
+    monitor.lap('init', tick)
+    history = []
+    reason = None
+
+    for gen in range(generations):
+        tick = time.perf_counter()
+        p1 = population[_tournament(rank, crowding, pop_size, rng)]
+        p2 = population[_tournament(rank, crowding, pop_size, rng)]
+        children = _crossover_genes(p1, p2, rng)
+        tick = monitor.lap('reproduce', tick)
+        _mutate_genes(children, sampler, goal, mutation_rate)
+        tick = monitor.lap('mutate', tick)
+
+        merged = np.unique(np.vstack([population, children]), axis=0)
+        F = evaluate_objectives(merged, catalog, budget, cal_target)
+        tick = monitor.lap('evaluate', tick)
+        rank = non_dominated_sort(F)
+        crowding = crowding_distance(F, rank)
+        keep = np.lexsort((-crowding, rank))[:pop_size]
+        population, F, rank, crowding = merged[keep], F[keep], rank[keep], crowding[keep]
+
+        history.append(_pareto_pick(F)[1])
+        monitor.lap('sort', tick)
+
+        reason = stop.check(history)
+        if monitor.observers:
+            monitor.generation(gen, generations, history[-1], lambda: _pareto_fitness(F),
+                               lambda: float(np.mean(rank == 0)))
+        if reason:
+            break
+
+    order = np.flatnonzero(rank == 0)
+    order = order[np.argsort(population_totals(population[order], catalog)[0], kind='stable')]
+    front = [catalog.schedule_from_genes(genes, goal_type=goal, sampler=sampler) for genes in population[order]]
+    for plan in front:
+        plan.calculate_fitness(budget, cal_target)
+    best = front[_pareto_pick(F[order])[0]]
+    best.front = front
+    best.engine = 'pareto'
+    return monitor.finish(_finish(best, stop, reason, history), history), history
+
+
+def _spread_lunches(plan, lunch_codes):
+    """
+    Orders the days of an (n_days, 3) gene matrix with the fewest consecutive repeated lunches the
+    multiset allows: days grouped by lunch, most frequent first, go to the even then the odd
+    positions; copies of a lunch held by more than half the days go last (one repeat each).
+    Totals are order-independent, so only the variety penalty changes.
+    """
+    lunch = lunch_codes[plan[:, 1]]
+    _, inverse, counts = np.unique(lunch, return_inverse=True, return_counts=True)
+    order = np.lexsort((np.arange(len(plan)), inverse, -counts[inverse]))
+    n, top = len(plan), counts.max()
+    excess = _min_repeats(top, n)
+    if excess:
+        order = np.r_[order[:top - excess], order[top:], order[top - excess:top]]
+    k = n - excess
+    slots = np.r_[np.arange(0, k, 2), np.arange(1, k, 2), np.arange(k, n)]
+    arranged = np.empty_like(plan)
+    arranged[slots] = plan[order]
+    return arranged
+
+def _min_repeats(top, n_days):
+    """Consecutive repeats left after _spread_lunches when one lunch fills `top` of n_days days."""
+    return np.maximum(0, 2 * top - n_days - 1)
+
+def _polish_plan(plan, catalog, budget, cal_target, candidates, max_rounds=500):
+    """
+    Steepest descent on the exact objective (lunch repeats counted as after _spread_lunches):
+    each round replaces the one day of an (n_days, 3) gene matrix that helps most with one of the
+    candidate days (an (n, 3) gene matrix). Removes the DP's grid rounding.
+    """
+    plan = plan.copy()
+    n = len(plan)
+    codes = catalog.lunch_codes
+    counts = np.bincount(codes[plan[:, 1]], minlength=codes.max() + 1)
+    cand_cost = sum(catalog.price[m][candidates[:, m]] for m in range(3))
+    cand_cal = sum(catalog.cal[m][candidates[:, m]] for m in range(3))
+    cand_lunch = codes[candidates[:, 1]]
+    identity = np.eye(len(counts), dtype=int)
+
+    def day_totals(rows):
+        return (sum(catalog.price[m][rows[:, m]] for m in range(3)),
+                sum(catalog.cal[m][rows[:, m]] for m in range(3)))
+
+    def error(c, k, repeats):
+        return 0.5 * np.abs(budget - c) / budget + 0.5 * np.abs(cal_target - k) / cal_target + 0.05 * repeats
+
+    day_cost, day_cal = day_totals(plan)
+    cost, cal = float(day_cost.sum()), float(day_cal.sum())
+    current = error(cost, cal, _min_repeats(counts.max(), n))
+    for _ in range(max_rounds):
+        day_cost, day_cal = day_totals(plan)
+        # Repeats after moving day i from its lunch to lunch c, for every (i, c)
+        moved = counts + identity[None, :, :] - identity[codes[plan[:, 1]]][:, None, :]
+        repeats = _min_repeats(moved.max(axis=2), n)[:, cand_lunch]
+        err = error(cost + cand_cost[None, :] - day_cost[:, None], cal + cand_cal[None, :] - day_cal[:, None],
+                    repeats)
+        i, x = np.unravel_index(np.argmin(err), err.shape)
+        if err[i, x] >= current - 1e-12:
+            break
+        cost += cand_cost[x] - day_cost[i]
+        cal += cand_cal[x] - day_cal[i]
+        counts[codes[plan[i, 1]]] -= 1
+        counts[cand_lunch[x]] += 1
+        plan[i], current = candidates[x], err[i, x]
+    return plan
+
+def _complete_exactly(plan, catalog, budget, cal_target, candidates, max_pairs=64, max_tries=32):
+    """
+    Tries to hit the budget and the calorie target exactly by re-choosing two days of an
+    (n_days, 3) gene matrix: two candidate days whose totals add up to what the other days leave
+    zero both errors (found with one sorted lookup per pair of days). Kept only if the objective,
+    lunch repeats included, improves.
+    """
+    n = len(plan)
+    codes = catalog.lunch_codes
+    cand_cost = sum(catalog.price[m][candidates[:, m]] for m in range(3)).astype(np.int64)
+    cand_cal = sum(catalog.cal[m][candidates[:, m]] for m in range(3)).astype(np.int64)
+    width = int(cand_cal.max()) + 1
+    keys = cand_cost * width + cand_cal
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    def error(rows):
+        cost = sum(catalog.price[m][rows[:, m]].sum() for m in range(3))
+        cal = sum(catalog.cal[m][rows[:, m]].sum() for m in range(3))
+        repeats = _min_repeats(np.bincount(codes[rows[:, 1]]).max(), len(rows))
+        return 0.5 * abs(budget - cost) / budget + 0.5 * abs(cal_target - cal) / cal_target + 0.05 * repeats
+
+    current = error(plan)
+    if current == 0 or budget != int(budget) or cal_target != int(cal_target):
+        return plan
+    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)][:max_pairs]
+    for i, j in pairs:
+        rest = np.delete(plan, [i, j], axis=0)
+        left_cost = int(budget) - int(sum(catalog.price[m][rest[:, m]].sum() for m in range(3)))
+        left_cal = int(cal_target) - int(sum(catalog.cal[m][rest[:, m]].sum() for m in range(3)))
+        need_cost, need_cal = left_cost - cand_cost, left_cal - cand_cal
+        ok = (need_cost >= 0) & (need_cal >= 0) & (need_cal < width)
+        need = need_cost * width + need_cal
+        pos = np.searchsorted(sorted_keys, need)
+        ok &= pos < len(keys)
+        ok[ok] = sorted_keys[pos[ok]] == need[ok]
+        for x in np.flatnonzero(ok)[:max_tries]:
+            trial = np.vstack([rest, candidates[x], candidates[order[pos[x]]]])
+            trial_err = error(trial)
+            if trial_err < current:
+                return trial
+    return plan
+
+class _DayGrid:
+    """
+    State space of the DP engine (run_exact_optimizer) for one filtered catalog.
+    Every (breakfast, lunch, dinner) day is bucketed on a (cost, calorie) grid of axis_cells per axis,
+    sized for a block of block_days. Lunch variety is built into the states: days are added in pairs
+    with different lunches (plus one single day for odd blocks), and a multiset made of such pairs is
+    exactly one that _spread_lunches can order without a repeated lunch. reachable[q] holds the cells
+    reachable with q pairs: the previous cells convolved with the pair buckets (one FFT per pair).
+    """
+    def __init__(self, catalog, block_days, max_days, axis_cells):
+        b, l, d = (idx.ravel() for idx in np.indices([len(df) for df in catalog.frames]))
+        self.days = np.column_stack([b, l, d])  # gene rows of every possible day
+        self.day_cost = catalog.price[0][b] + catalog.price[1][l] + catalog.price[2][d]
+        self.day_cal = catalog.cal[0][b] + catalog.cal[1][l] + catalog.cal[2][d]
+        self.lunch = catalog.lunch_codes[l]
+        self.cost_step = max(1.0, block_days * self.day_cost.max() / axis_cells)
+        self.cal_step = max(1.0, block_days * self.day_cal.max() / axis_cells)
+        self.cost_cell = np.rint(self.day_cost / self.cost_step).astype(np.int64)
+        self.cal_cell = np.rint(self.day_cal / self.cal_step).astype(np.int64)
+        self.shape = (self.cost_cell.max() + 1, self.cal_cell.max() + 1)
+        self._index_buckets()
+        self._build_pair_kernel(max_days // 2)
+        self.reachable = [np.ones((1, 1), dtype=bool)]
+        for _ in range(max_days // 2):
+            self.reachable.append(self._convolve(self.reachable[-1], self._pair_spectrum, self._pair_shape))
+        self._ends = {}
+
+    def _index_buckets(self):
+        """Lunch counts per bucket, and the days of each bucket (sorted by lunch) for tracebacks."""
+        self.lunch_count = np.zeros(self.shape + (self.lunch.max() + 1,))
+        np.add.at(self.lunch_count, (self.cost_cell, self.cal_cell, self.lunch), 1)
+        self.occupied = self.lunch_count.sum(axis=2) > 0
+        self.n_lunches = (self.lunch_count > 0).sum(axis=2)
+        self.only_lunch = self.lunch_count.argmax(axis=2)
+        flat = self.cost_cell * self.shape[1] + self.cal_cell
+        self.day_order = np.lexsort((self.lunch, flat))
+        self.bucket_ids, self.bucket_start = np.unique(flat[self.day_order], return_index=True)
+        self.bucket_cost, self.bucket_cal = np.divmod(self.bucket_ids, self.shape[1])
+
+    def _build_pair_kernel(self, max_pairs):
+        """Buckets of two days with different lunches (of any two days if there is one lunch)."""
+        shape = self.shape
+        grid = (max_pairs * 2 * (shape[0] - 1) + shape[0], max_pairs * 2 * (shape[1] - 1) + shape[1])
+        self.fft_shape = tuple(1 << int(np.ceil(np.log2(n))) for n in grid)
+        pair_fft = tuple(1 << int(np.ceil(np.log2(2 * n - 1))) for n in shape)
+        crop = (slice(0, 2 * shape[0] - 1), slice(0, 2 * shape[1] - 1))
+        spectra = np.fft.rfft2(self.lunch_count, pair_fft, axes=(0, 1))
+        all_pairs = spectra.sum(axis=2) ** 2
+        self.distinct = self.lunch_count.shape[2] > 1
+        pair_counts = all_pairs - (spectra ** 2).sum(axis=2) if self.distinct else all_pairs
+        pairs = np.fft.irfft2(pair_counts, pair_fft)[crop] > 0.5
+        if not pairs.any():
+            self.distinct, pairs = False, np.fft.irfft2(all_pairs, pair_fft)[crop] > 0.5
+        self.pair_cost, self.pair_cal = np.nonzero(pairs)
+        self._pair_shape = pairs.shape
+        self._pair_spectrum = np.fft.rfft2(pairs, self.fft_shape)
+        self._single_spectrum = np.fft.rfft2(self.occupied, self.fft_shape)
+
+    def _convolve(self, cells, spectrum, kernel_shape):
+        """Cells reachable from `cells` by adding one kernel entry (FFT convolution, thresholded)."""
+        out = (cells.shape[0] + kernel_shape[0] - 1, cells.shape[1] + kernel_shape[1] - 1)
+        return np.fft.irfft2(np.fft.rfft2(cells, self.fft_shape) * spectrum, self.fft_shape)[:out[0], :out[1]] > 0.5
+
+    def end_cells(self, n_days):
+        """Cells reachable with n_days days (the pairs plus one single day when n_days is odd)."""
+        if n_days not in self._ends:
+            n_pairs, odd = divmod(n_days, 2)
+            cells = self.reachable[n_pairs]
+            self._ends[n_days] = self._convolve(cells, self._single_spectrum, self.shape) if odd else cells
+        return self._ends[n_days]
+
+    def _pick(self, kernel_cost, kernel_cal, cost, cal, previous, units):
+        """Kernel entry leading from cell (cost, cal) back to a previous cell, nearest the per-unit average."""
+        prev_cost, prev_cal = cost - kernel_cost, cal - kernel_cal
+        ok = (prev_cost >= 0) & (prev_cal >= 0) & (prev_cost < previous.shape[0]) & (prev_cal < previous.shape[1])
+        ok[ok] = previous[prev_cost[ok], prev_cal[ok]]
+        valid = np.flatnonzero(ok)
+        spread = (np.abs(kernel_cost[valid] - cost / units) / self.shape[0]
+                  + np.abs(kernel_cal[valid] - cal / units) / self.shape[1])
+        return valid[np.argmin(spread)]
+
+    def _bucket_days(self, cost, cal):
+        """Indices of the days in bucket (cost, cal)."""
+        k = np.searchsorted(self.bucket_ids, cost * self.shape[1] + cal)
+        end = self.bucket_start[k + 1] if k + 1 < len(self.bucket_start) else len(self.day_order)
+        return self.day_order[self.bucket_start[k]:end]
+
+    def _split_pair(self, cost, cal):
+        """Two days (with different lunches when possible) whose buckets add up to pair cell (cost, cal)."""
+        other_cost, other_cal = cost - self.bucket_cost, cal - self.bucket_cal
+        ok = (other_cost >= 0) & (other_cal >= 0) & (other_cost < self.shape[0]) & (other_cal < self.shape[1])
+        ok[ok] = self.occupied[other_cost[ok], other_cal[ok]]
+        if self.distinct:
+            cand = np.flatnonzero(ok)
+            first_cells = (self.bucket_cost[cand], self.bucket_cal[cand])
+            other_cells = (other_cost[cand], other_cal[cand])
+            ok[cand] = ((self.n_lunches[first_cells] > 1) | (self.n_lunches[other_cells] > 1)
+                        | (self.only_lunch[first_cells] != self.only_lunch[other_cells]))
+        valid = np.flatnonzero(ok)
+        k = valid[np.argmin(np.abs(self.bucket_cost[valid] - cost / 2) + np.abs(self.bucket_cal[valid] - cal / 2))]
+        first = self._bucket_days(self.bucket_cost[k], self.bucket_cal[k])
+        second = self._bucket_days(other_cost[k], other_cal[k])
+        for day in first:
+            other = second[self.lunch[second] != self.lunch[day]] if self.distinct else second
+            if len(other):
+                return [day, other[0]]
+
+    def trace(self, cost, cal, n_days):
+        """Indices of n_days days whose buckets add up to end cell (cost, cal)."""
+        n_pairs, odd = divmod(n_days, 2)
+        days = []
+        if odd:
+            k = self._pick(self.bucket_cost, self.bucket_cal, cost, cal, self.reachable[n_pairs], n_days)
+            days.append(self._bucket_days(self.bucket_cost[k], self.bucket_cal[k])[0])
+            cost, cal = cost - self.bucket_cost[k], cal - self.bucket_cal[k]
+        for q in range(n_pairs, 0, -1):
+            k = self._pick(self.pair_cost, self.pair_cal, cost, cal, self.reachable[q - 1], q)
+            days.extend(self._split_pair(self.pair_cost[k], self.pair_cal[k]))
+            cost, cal = cost - self.pair_cost[k], cal - self.pair_cal[k]
+        return np.array(days)
+
+def _solve_block(grid, n_days, budget, cal_target):
+    """
+    Branch and bound over the end cells of an n_days block of a _DayGrid: cells are traced back in
+    order of their grid error until that error, less the largest rounding a cell can hide, cannot
+    beat the best plan traced so far. Returns the traced plans (indices into grid.days), best first.
+    """
+    cost_cells, cal_cells = np.nonzero(grid.end_cells(n_days))
+    approx_err = (0.5 * np.abs(budget - cost_cells * grid.cost_step) / budget
+                  + 0.5 * np.abs(cal_target - cal_cells * grid.cal_step) / cal_target)
+    rounding = 0.5 * n_days * grid.cost_step / 2 / budget + 0.5 * n_days * grid.cal_step / 2 / cal_target
+    traced, best_err = [], np.inf
+    for cell in np.argsort(approx_err, kind='stable'):
+        if approx_err[cell] - rounding >= best_err:
+            break
+        days = grid.trace(cost_cells[cell], cal_cells[cell], n_days)
+        err = (0.5 * abs(budget - grid.day_cost[days].sum()) / budget
+               + 0.5 * abs(cal_target - grid.day_cal[days].sum()) / cal_target
+               + 0.05 * _min_repeats(np.bincount(grid.lunch[days]).max(), n_days))
+        traced.append((err, len(traced), days))
+        best_err = min(best_err, err)
+    return [days for _, _, days in sorted(traced)]
+
+def run_exact_optimizer(b_df, l_df, d_df, budget, cal_target, pop_size=100, generations=150,
+                        p_bar=None, status_txt=None, axis_cells=256, max_combinations=500_000, n_starts=8,
+                        seed=None, n_days=DEFAULT_DAYS, block_days=7, observers=None):
+    """
+    Deterministic alternative to the GA: dynamic programming over discretized (cost, calorie) states.
+    1. _DayGrid buckets every possible day on an axis_cells grid and finds the (cost, calorie) cells
+       reachable with pairs of days with different lunches (lunch variety is part of the states).
+    2. _solve_block traces the reachable end cells back to plans (branch and bound), so each block
+       is optimal up to the grid resolution.
+    3. _polish_plan then swaps whole days on the exact objective to remove the rounding, and
+       _complete_exactly re-chooses two days when that hits both targets exactly; within one
+       block this runs from the n_starts best tracebacks and the best result wins.
+    Horizons longer than block_days are solved in blocks from the last one back, each aiming at the
+    budget and calories still left per day, so grid rounding is corrected instead of accumulated;
+    the reachable grids are shared by blocks of the same length, so the cost is linear in n_days.
+    Observers get one generation per solved block plus one for the polish, so callers can show
+    progress and cancel between blocks.
+    Falls back to run_genetic_algorithm (with seed) when the catalog has more than max_combinations
+    distinct days.
+    """
+    catalog = MealCatalog(b_df, l_df, d_df)
+    n_combos = len(b_df) * len(l_df) * len(d_df)
+    if catalog.empty or n_combos > max_combinations:
+        best, history = run_genetic_algorithm(b_df, l_df, d_df, budget, cal_target, pop_size, generations,
+                                              p_bar, status_txt, vectorized=True, seed=seed, n_days=n_days,
+                                              observers=observers)
+        best.engine = 'ga'
+        return best, history
+
+    goal = detect_goal(cal_target, n_days)
+    observers = list(observers or [])
+    if p_bar is not None or status_txt is not None:
+        observers.append(StreamlitProgress(p_bar, status_txt))
+    monitor = _Monitor(observers, {'engine': 'exact', 'pop_size': pop_size, 'generations': generations,
+                                   'goal': goal, 'n_days': n_days})
+    stop = StoppingRule()
+    blocks = [block_days] * (n_days // block_days) + [n_days % block_days] * bool(n_days % block_days)
+
+    grid = _DayGrid(catalog, block_days, max(blocks), axis_cells)
+    genes, left_budget, left_cal, left_days = [], budget, cal_target, n_days
+    for k, n in enumerate(reversed(blocks)):
+        share = n / left_days
+        plans = _solve_block(grid, n, left_budget * share, left_cal * share)
+        genes.insert(0, plans[0])
+        left_budget -= grid.day_cost[plans[0]].sum()
+        left_cal -= grid.day_cal[plans[0]].sum()
+        left_days -= n
+        # Progress: the solved days against their share of the targets
+        done = (n_days - left_days) / n_days
+        cost_err = abs(budget * done - (budget - left_budget)) / (budget * done)
+        cal_err = abs(cal_target * done - (cal_target - left_cal)) / (cal_target * done)
+        monitor.generation(k, len(blocks) + 1, -(0.5 * cost_err + 0.5 * cal_err))
+
+    # Exact polish of the best few first blocks (with the rest fixed), then the order with the
+    #    fewest repeated lunches
+    best_plan, best_err = None, np.inf
+    for first in plans[:n_starts if len(blocks) == 1 else 1]:
+        plan = grid.days[np.concatenate([first] + genes[1:])]
+        plan = _polish_plan(plan, catalog, budget, cal_target, grid.days)
+        plan = _complete_exactly(plan, catalog, budget, cal_target, grid.days)
+        fitness, _, _ = evaluate_population(_spread_lunches(plan, catalog.lunch_codes).reshape(1, -1), catalog,
+                                            budget, cal_target)
+        if -fitness[0] < best_err:
+            best_plan, best_err = plan, -fitness[0]
+    plan = _spread_lunches(best_plan, catalog.lunch_codes)
+    best = catalog.schedule_from_genes(plan.ravel(), goal_type=goal)
+    best.calculate_fitness(budget, cal_target)
+    best.engine = 'exact'
+    monitor.generation(len(blocks), len(blocks) + 1, best.fitness)
+    if status_txt is not None:
+        status_txt.text(f"DP search: Accuracy {best.accuracy:.1f}%")
+    return monitor.finish(_finish(best, stop, 'exact', [best.fitness]), [best.fitness]), [best.fitness]
+
+
+CACHE_DIR = ".plan_cache"
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache of optimization results.
+    Key: sha256 of the run parameters + the filtered catalog's content hash.
+    Value: the best plan's genes and the fitness history (.npz, rebuilt against the catalog on load,
+    so a hit is bit-identical to the original run), the Pareto front's genes in Pareto mode, and the
+    engine, stop_reason and stopped_at of the original run.
+    Least-recently-used entries are evicted once max_entries or max_bytes is exceeded.
+    """
+    RUN_ATTRS = ('engine', 'stop_reason', 'stopped_at')
+
+    def __init__(self, directory=CACHE_DIR, max_entries=2000, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(catalog, **params):
+        payload = json.dumps({'catalog': catalog.content_hash, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key, catalog, goal_type='standard'):
+        """Returns (best, history) or None on a miss; best carries the stored run attributes."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                genes, history = data['genes'], data['history'].tolist()
+                front = (data['front'], int(data['front_best'])) if 'front' in data.files else None
+                run = {attr: data[attr].item() for attr in self.RUN_ATTRS if attr in data.files}
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        try:
+            os.utime(path)  # LRU: a hit makes the entry most recent
+        except FileNotFoundError:
+            pass  # evicted by another process since it was read
+        if front is None:
+            best = catalog.schedule_from_genes(genes, goal_type=goal_type)
+        else:
+            sampler = MealSampler(catalog)
+            plans = [catalog.schedule_from_genes(g, goal_type=goal_type, sampler=sampler) for g in front[0]]
+            best = plans[front[1]]
+            best.front = plans
+        for attr, value in run.items():
+            setattr(best, attr, value)
+        return best, history
+
+    def put(self, key, catalog, best, history):
+        os.makedirs(self.directory, exist_ok=True)
+        # A private temp file per writer: pool workers may finish the same request at the same time
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=key, suffix='.tmp')
+        arrays = {'genes': catalog.genes_from_schedule(best), 'history': np.asarray(history, dtype=float)}
+        arrays.update({attr: np.asarray(getattr(best, attr)) for attr in self.RUN_ATTRS if hasattr(best, attr)})
+        front = getattr(best, 'front', None)
+        if front:
+            arrays['front'] = np.array([catalog.genes_from_schedule(plan) for plan in front])
+            arrays['front_best'] = front.index(best)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Drops the least recently used entries; other processes may be evicting concurrently."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    info = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, name))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, name = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+WARM_START_PATH = ".warm_start.jsonl"
+WARM_FRACTION = 0.2
+
+class WarmStartStore:
+    """
+    Persisted store of past best plans for warm-starting the GA on nearby requests.
+    Entries are keyed by (catalog hash, excluded categories, horizon, budget, calories) and hold
+    the plan as row labels of the full catalog, so a plan found under other exclusions can be
+    re-validated against the current ones. Lookups are a brute-force nearest-neighbour scan over
+    at most max_entries records (append-only JSON lines; when full, the file is compacted to the
+    newest half, so rewrites happen once per max_entries // 2 runs).
+    """
+    def __init__(self, catalog_df, path=WARM_START_PATH, k=5, max_distance=0.25, max_entries=5000):
+        self.path = path
+        self.k = k
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.catalog_id = hashlib.sha256(
+            pd.util.hash_pandas_object(catalog_df, index=True).to_numpy().tobytes()).hexdigest()
+        self.categories = set(catalog_df['Category'].astype(str)) if not catalog_df.empty else set()
+        self._stamp = None
+        self._offset = 0
+        self._entries = []
+
+    def excluded_for(self, catalog):
+        """Categories of the full catalog that the filtered catalog no longer contains."""
+        present = set().union(*(df['Category'].astype(str) for df in catalog.frames))
+        return sorted(self.categories - present)
+
+    def _load(self):
+        """
+        All entries. Lines appended since the last call (by any process) are parsed incrementally;
+        the file is only re-read in full after a compaction replaced it.
+        """
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            self._stamp, self._offset, self._entries = None, 0, []
+            return self._entries
+        if (info.st_dev, info.st_ino) != self._stamp or info.st_size < self._offset:
+            self._stamp, self._offset, self._entries = (info.st_dev, info.st_ino), 0, []
+        if info.st_size > self._offset:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1  # a line still being appended is picked up next time
+            for line in data[:end].splitlines():
+                try:
+                    self._entries.append(json.loads(line))
+                except ValueError:
+                    continue  # a torn write
+            self._offset += end
+        return self._entries
+
+    def nearest(self, excluded, budget, cal_target, n_days):
+        """
+        Up to k entries of this catalog and horizon, closest first. Distance: the log ratios of
+        budget and calories plus the Jaccard distance of the excluded sets; entries farther
+        than max_distance are ignored.
+        """
+        entries = [e for e in self._load() if e['catalog'] == self.catalog_id and e['n_days'] == n_days]
+        if not entries:
+            return []
+        excluded = set(excluded)
+        targets = np.array([(e['budget'], e['cal_target']) for e in entries], dtype=float)
+        overlap = np.array([
+            len(excluded ^ set(e['excluded'])) / max(1, len(excluded | set(e['excluded']))) for e in entries
+        ])
+        distance = np.abs(np.log(targets / [budget, cal_target])).sum(axis=1) + overlap
+        order = np.argsort(distance, kind='stable')[:self.k]
+        return [entries[i] for i in order if distance[i] <= self.max_distance]
+
+    @staticmethod
+    def _validate(catalog, labels, sampler, goal):
+        """Stored labels -> genes of the current filtered catalog; excluded meals are redrawn."""
+        labels = np.asarray(labels)
+        genes = np.empty(len(labels), dtype=np.int32)
+        for m, df in enumerate(catalog.frames):
+            idx = df.index.get_indexer(labels[m::3])
+            bad = idx < 0
+            if bad.any():
+                idx[bad] = sampler.draw(goal, m, int(bad.sum()))
+            genes[m::3] = idx
+        return genes
+
+    def seed_genes(self, catalog, budget, cal_target, n_days, pop_size, fraction=WARM_FRACTION, seed=None):
+        """
+        A (round(fraction * pop_size), n_days * 3) gene matrix built from the nearest past plans,
+        or None when there are none. Each distinct plan appears once as is; the remaining rows are
+        copies with one day per week redrawn, so the seeds do not collapse the population.
+        """
+        n_seed = int(round(pop_size * fraction))
+        if n_seed <= 0 or catalog.empty:
+            return None
+        entries = self.nearest(self.excluded_for(catalog), budget, cal_target, n_days)
+        if not entries:
+            return None
+        goal = detect_goal(cal_target, n_days)
+        sampler = MealSampler(catalog, seed=seed)
+        plans = {}
+        for entry in entries:
+            genes = self._validate(catalog, entry['labels'], sampler, goal)
+            plans.setdefault(genes.tobytes(), genes)
+        plans = np.array(list(plans.values()))
+        genes = plans[np.arange(n_seed) % len(plans)]
+        _mutate_genes(genes[len(plans):], sampler, goal, mutation_rate=1.0)
+        return genes
+
+    def add(self, catalog, budget, cal_target, n_days, best):
+        """Records a finished run's best plan (compacting the file beyond max_entries)."""
+        genes = catalog.genes_from_schedule(best).reshape(-1, 3)
+        labels = np.column_stack([df.index.to_numpy()[genes[:, m]] for m, df in enumerate(catalog.frames)])
+        entry = {
+            'catalog': self.catalog_id, 'excluded': self.excluded_for(catalog), 'n_days': n_days,
+            'budget': float(budget), 'cal_target': float(cal_target), 'fitness': float(best.fitness),
+            'labels': labels.ravel().tolist(),
+        }
+        entries = self._load()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if len(entries) >= self.max_entries:
+            # A private temp file per writer: job-service workers may compact at the same time
+            fd, tmp = tempfile.mkstemp(dir=directory or '.', prefix=os.path.basename(self.path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for e in entries[len(entries) - max(0, self.max_entries // 2 - 1):] + [entry]:
+                        f.write(json.dumps(e) + "\n")
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        else:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def optimize_plan(b_df, l_df, d_df, budget, cal_target, pop_size, generations, p_bar=None, status_txt=None,
+                  engine='ga', seed=None, cache=None, observers=None, n_days=DEFAULT_DAYS, warm_start=None,
+                  warm_fraction=WARM_FRACTION, **ga_options):
+    """
+    Single entry point used by the UI: runs the selected engine ('ga', 'exact' or 'pareto') through
+    the result cache ('exact' is the deterministic DP engine, run_exact_optimizer). Only reproducible
+    runs are cached (a fixed seed, or the DP engine).
+    ga_options (vectorized, islands, ...) are forwarded to run_genetic_algorithm (the Pareto mode takes
+    only the stopping options) and are part of the key; observers are not (a cache hit notifies nobody).
+    With a WarmStartStore, warm_fraction of the GA / Pareto population is seeded from the nearest
+    past plans, and every fresh result is added to the store; a digest of those seeds is part of the
+    key, since they change as the store grows.
+    """
+    catalog = MealCatalog(b_df, l_df, d_df)
+    goal = detect_goal(cal_target, n_days)
+    stop = StoppingRule()
+    initial = None
+    if warm_start is not None and warm_fraction > 0 and engine != 'exact':
+        initial = warm_start.seed_genes(catalog, budget, cal_target, n_days, pop_size, warm_fraction, seed)
+    cacheable = cache is not None and not catalog.empty and (seed is not None or engine == 'exact')
+    if cacheable:
+        seeds = None if initial is None else hashlib.sha256(initial.tobytes()).hexdigest()
+        key = ResultCache.make_key(catalog, budget=budget, cal_target=cal_target, pop_size=pop_size,
+                                   generations=generations, engine=engine, seed=seed, n_days=n_days,
+                                   warm_start=seeds, objectives=OBJECTIVES if engine == 'pareto' else None,
+                                   **ga_options)
+        hit = cache.get(key, catalog, goal_type=goal)
+        if hit is not None:
+            best, history = hit
+            for plan in getattr(best, 'front', None) or [best]:
+                plan.calculate_fitness(budget, cal_target)
+            if not hasattr(best, 'stop_reason'):  # entry written before run attributes were stored
+                _finish(best, stop, 'cached', history)
+            best.engine = getattr(best, 'engine', engine)
+            best.execution_time = stop.elapsed_ms() / 1000
+            best.warm_started = 0 if initial is None else len(initial)
+            best.cached = True
+            return best, history
+
+    if engine == 'exact':
+        best, history = run_exact_optimizer(b_df, l_df, d_df, budget, cal_target, pop_size, generations,
+                                            p_bar, status_txt, seed=seed, n_days=n_days, observers=observers)
+    elif engine == 'pareto':
+        stopping = {k: v for k, v in ga_options.items()
+                    if k in ('stall_generations', 'tolerance', 'target_accuracy', 'time_budget_ms')}
+        best, history = run_pareto_optimizer(b_df, l_df, d_df, budget, cal_target, pop_size, generations,
+                                             p_bar, status_txt, seed=seed, observers=observers, n_days=n_days,
+                                             initial_genes=initial, **stopping)
+    else:
+        best, history = run_genetic_algorithm(b_df, l_df, d_df, budget, cal_target, pop_size, generations,
+                                              p_bar, status_txt, seed=seed, observers=observers, n_days=n_days,
+                                              initial_genes=initial, **ga_options)
+    if cacheable:
+        cache.put(key, catalog, best, history)
+    if warm_start is not None and not catalog.empty:
+        warm_start.add(catalog, budget, cal_target, n_days, best)
+    best.warm_started = 0 if initial is None else len(initial)
+    best.cached = False
+    return best, history
 
 
 # Eyad
+AGGREGATE_AFTER = 14  # longer plans are charted and summarized per week, not per day
+
+def summarize_plan(df, period=7):
+    """Aggregates the day table into blocks of `period` days (weeks) for long horizons."""
+    block = np.arange(len(df)) // period
+    out = df.groupby(block).agg(Days=('Day', 'size'), Cost=('Cost', 'sum'), Calories=('Calories', 'sum'))
+    out.insert(0, 'Week', [f"Week {i+1}" for i in range(len(out))])
+    out['Avg Daily Cost'] = (out['Cost'] / out['Days']).round(1)
+    out['Avg Daily Cal'] = (out['Calories'] / out['Days']).round(0)
+    return out.reset_index(drop=True)
+
 def plot_cost_analysis(schedule, budget):
-    """Bar chart for daily cost consistency."""
-    days = [f"Day {i+1}" for i in range(7)]
-    costs = [d['Breakfast']['Price'] + d['Lunch']['Price'] + d['Dinner']['Price'] for d in schedule.days]
+    """Bar chart for daily cost consistency (average daily cost per week on long horizons)."""
+    n_days = len(schedule.days)
+    costs = np.array([d.cost for d in schedule.days], dtype=float)
+    if n_days > AGGREGATE_AFTER:
+        block = np.arange(n_days) // 7
+        labels = [f"W{i+1}" for i in range(block[-1] + 1)]
+        costs = np.bincount(block, weights=costs) / np.bincount(block)
+        title = "Average Daily Spending per Week"
+    else:
+        labels = [f"Day {i+1}" for i in range(n_days)]
+        title = "Daily Spending"
     
     fig, ax = plt.subplots(figsize=(5, 3))
-    ax.bar(days, costs, color='#4A90E2', alpha=0.8)
-    ax.axhline(y=budget/7, color='red', linestyle='--', label='Target')
-    ax.set_title("Daily Spending")
+    ax.bar(labels, costs, color='#4A90E2', alpha=0.8)
+    ax.axhline(y=budget/n_days, color='red', linestyle='--', label='Target')
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45 if len(labels) > 7 else 0)
     ax.legend()
     return fig
 
@@ -215,6 +1704,25 @@ def plot_budget_split(schedule):
     ax.set_title("Budget Allocation")
     return fig
 
+def plot_pareto_front(front, budget, daily_cal, selected=None):
+    """Scatter of the Pareto plans: total cost vs. daily calories, coloured by repeated lunches."""
+    n_days = len(front[0].days)
+    costs = [plan.total_cost for plan in front]
+    cals = [plan.total_cal / n_days for plan in front]
+    fig, ax = plt.subplots(figsize=(10, 3))
+    points = ax.scatter(costs, cals, c=[plan.lunch_repeats for plan in front], cmap='viridis_r', s=30)
+    fig.colorbar(points, ax=ax, label="Repeated lunches")
+    if selected is not None:
+        ax.scatter([costs[selected]], [cals[selected]], s=160, facecolors='none', edgecolors='red', linewidths=2)
+    ax.axvline(x=budget, color='red', linestyle='--', label='Budget')
+    ax.axhline(y=daily_cal, color='orange', linestyle='--', label='Calorie Target')
+    ax.set_title("Pareto Front: Cost vs. Calories")
+    ax.set_xlabel("Total Cost (EGP)")
+    ax.set_ylabel("Kcal/day")
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
 def plot_learning_curve(history):
     """Line chart showing AI improvement over generations."""
     fig, ax = plt.subplots(figsize=(10, 3))
@@ -233,8 +1741,20 @@ def export_pdf(df, cost, cal):
     pdf.set_font("Arial", size=12)
     pdf.cell(200, 10, txt="Smart Nutrition Plan", ln=True, align='C')
     pdf.ln(5)
-    pdf.cell(200, 10, txt=f"Total Cost: {cost:.1f} EGP | Calories: {int(cal/7)} Kcal/day", ln=True)
+    pdf.cell(200, 10, txt=f"Total Cost: {cost:.1f} EGP | Calories: {int(cal/len(df))} Kcal/day", ln=True)
     pdf.ln(5)
+
+    if len(df) > AGGREGATE_AFTER:
+        summary = summarize_plan(df)
+        cols = ["Week", "Days", "Cost", "Calories", "Avg Daily Cost", "Avg Daily Cal"]
+        pdf.set_font("Arial", 'B', 8)
+        for h in cols: pdf.cell(30, 8, h, border=1)
+        pdf.ln()
+        pdf.set_font("Arial", size=7)
+        for _, row in summary.iterrows():
+            for h in cols: pdf.cell(30, 8, str(row[h]), border=1)
+            pdf.ln()
+        pdf.ln(5)
     
     cols = ["Day", "Breakfast", "Lunch", "Dinner", "Cost", "Cal"]
     widths = [20, 45, 45, 45, 20, 15]
@@ -252,68 +1772,252 @@ def export_pdf(df, cost, cal):
         pdf.cell(widths[4], 10, str(row['Cost']), border=1)
         pdf.cell(widths[5], 10, str(row['Calories']), border=1)
         pdf.ln()
-    return pdf.output(dest='S').encode('latin-1')
+    out = pdf.output(dest='S')  # str on PyFPDF, bytearray on fpdf2
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
 
 # Fady
+class PlanResult:
+    """
+    One optimization result kept in st.session_state. The table, charts and export
+    bytes are built on first use and memoized, so reruns only redraw.
+    """
+    def __init__(self, best, history, budget, daily_cal, params, profile=None):
+        self.best = best
+        self.history = history
+        self.budget = budget
+        self.daily_cal = daily_cal
+        self.params = params
+        self.profile = profile  # {'report', 'peak_memory_mb'} of a profiled run
+        self.front = getattr(best, 'front', None)  # Pareto mode: every alternative plan
+        self._variants = {}
+        self._pareto_figs = {}
+
+    def variant(self, i):
+        """PlanResult of the i-th Pareto plan (memoized, so each keeps its own charts and exports)."""
+        plan = self.front[i]
+        if plan is self.best:
+            return self
+        if i not in self._variants:
+            self._variants[i] = PlanResult(plan, self.history, self.budget, self.daily_cal, self.params)
+        return self._variants[i]
+
+    @cached_property
+    def front_table(self):
+        n_days = len(self.best.days)
+        return pd.DataFrame([{
+            "Total Cost": plan.total_cost,
+            "Daily Calories": int(plan.total_cal / n_days),
+            "Repeated Lunches": plan.lunch_repeats,
+            "Accuracy (%)": round(plan.accuracy, 1),
+        } for plan in self.front])
+
+    def pareto_fig(self, selected):
+        if selected not in self._pareto_figs:
+            self._pareto_figs[selected] = self._figure(
+                plot_pareto_front(self.front, self.budget, self.daily_cal, selected))
+        return self._pareto_figs[selected]
+
+    @cached_property
+    def summary(self):
+        return summarize_plan(self.table)
+
+    @cached_property
+    def table(self):
+        rows = []
+        for i, d in enumerate(self.best.days):
+            rows.append({
+                "Day": f"Day {i+1}",
+                "Breakfast": d['Breakfast']['Name'],
+                "Lunch": d['Lunch']['Name'],
+                "Dinner": d['Dinner']['Name'],
+                "Cost": d.cost,
+                "Calories": d.cal
+            })
+        return pd.DataFrame(rows)
+
+    def _figure(self, fig):
+        plt.close(fig)  # kept here, not in pyplot's global registry
+        return fig
+
+    @cached_property
+    def cost_fig(self):
+        return self._figure(plot_cost_analysis(self.best, self.budget))
+
+    @cached_property
+    def split_fig(self):
+        return self._figure(plot_budget_split(self.best))
+
+    @cached_property
+    def curve_fig(self):
+        return self._figure(plot_learning_curve(self.history))
+
+    @cached_property
+    def excel_bytes(self):
+        excel_io = io.BytesIO()
+        if len(self.table) > AGGREGATE_AFTER:
+            with pd.ExcelWriter(excel_io) as writer:
+                self.table.to_excel(writer, sheet_name="Plan", index=False)
+                self.summary.to_excel(writer, sheet_name="Weekly Summary", index=False)
+        else:
+            self.table.to_excel(excel_io, index=False)
+        return excel_io.getvalue()
+
+    @cached_property
+    def pdf_bytes(self):
+        return export_pdf(self.table, self.best.total_cost, self.best.total_cal)
+
+
+def describe_stop(best):
+    """How a run ended, in words, for the status line (a cache hit reports the original run)."""
+    gens = f"{best.stopped_at} generation{'s' * (best.stopped_at != 1)}"
+    text = {
+        'generations': f"ran all {gens}",
+        'stalled': f"stopped after {gens} without improvement",
+        'target_accuracy': f"reached the target accuracy after {gens}",
+        'time_budget': f"hit the time budget after {gens}",
+        'exact': "dynamic-programming search",
+        'cached': "loaded from the result cache",
+    }.get(best.stop_reason, best.stop_reason)
+    if getattr(best, 'cached', False) and best.stop_reason != 'cached':
+        text = f"loaded from the result cache (original run: {text})"
+    return f"{text}, {best.execution_time:.2f}s"
+
+
+def render_result(result, stale=False):
+    """Dashboard for a stored result; only the selected view is built."""
+    best, budget, daily_cal = result.best, result.budget, result.daily_cal
+    n_days = len(best.days)
+    st.text(f"Done: {describe_stop(best)}.")
+    if stale:
+        st.info("Inputs changed since this plan was made. Press Run Optimization to update it.")
+    if result.profile is not None:
+        with st.expander("Run Profile"):
+            st.text(f"Peak traced memory: {result.profile['peak_memory_mb'] or 0:.1f} MB")
+            st.code(result.profile['report'])
+
+    # Pareto mode: every view below follows the plan picked from the front
+    root, front, pick = result, result.front, None
+    if front:
+        pick = st.selectbox(
+            f"Pareto-optimal plans ({len(front)}, cheapest first)", range(len(front)), index=front.index(best),
+            format_func=lambda i: (f"{front[i].total_cost} EGP | {int(front[i].total_cal / n_days)} Kcal/day | "
+                                   f"{front[i].lunch_repeats} repeated lunches"),
+        )
+        result = root.variant(pick)
+        best = result.best
+
+    # 4. Member 5: Dashboard
+    st.divider()
+    k1, k2, k3 = st.columns(3)
+    diff_c = best.total_cost - budget
+    diff_k = (best.total_cal/n_days) - daily_cal
+    
+    k1.metric(f"Total Cost ({n_days} days)", f"{best.total_cost} EGP", f"{diff_c:+.0f}", delta_color="inverse")
+    k2.metric("Daily Calories", f"{int(best.total_cal/n_days)} Kcal", f"{diff_k:+.0f}")
+    k3.metric("AI Accuracy", f"{best.accuracy:.1f}%")
+
+    # st.tabs renders every tab on each run; a radio only builds the open one
+    views = [" Schedule", " Analytics", " Export"] + ([" Pareto Front"] if front else [])
+    view = st.radio("View", views, horizontal=True, label_visibility="collapsed", key="result_view")
+    if view == " Schedule":
+        if n_days > AGGREGATE_AFTER:
+            st.dataframe(result.summary, use_container_width=True, hide_index=True)
+        st.dataframe(result.table, use_container_width=True, hide_index=True)
+    elif view == " Analytics":
+        c1, c2 = st.columns(2)
+        c1.pyplot(result.cost_fig)
+        c2.pyplot(result.split_fig)
+        st.pyplot(result.curve_fig)
+    elif view == " Export":
+        st.download_button("Excel", result.excel_bytes, "Plan.xlsx")
+        st.download_button("PDF", result.pdf_bytes, "Plan.pdf")
+    else:
+        st.pyplot(root.pareto_fig(pick))
+        st.dataframe(root.front_table, use_container_width=True)
+
+
+@st.cache_resource
+def get_job_service():
+    """One job service per server process, shared by every session (bounded concurrency)."""
+    from job_service import JobService  # job_service imports this module
+    return JobService()
+
+
+def poll_job(service, job, interval=0.5):
+    """Shows a submitted job's progress and reruns until it finishes, then stores its PlanResult."""
+    status = service.status(job['id'])
+    if status is None or status['status'] in service.FINISHED:
+        del st.session_state['job']
+        if status is None:
+            st.error("Error: The optimization job was lost. Please run it again.")
+        elif status['status'] == 'failed':
+            st.error(f"Error: {status['error']}")
+        elif status['status'] == 'cancelled':
+            st.warning("Optimization cancelled.")
+        else:
+            request, result = job['request'], service.result(job['id'])
+            b_df, l_df, d_df = load_and_filter_data(request['excluded'])
+            best = service.schedule(job['id'], b_df, l_df, d_df)
+            st.session_state['result'] = PlanResult(best, result['history'], request['budget'], job['daily_cal'],
+                                                    job['params'], result['profile'])
+        return
+
+    st.progress(status['progress'])
+    if status['status'] == 'queued':
+        st.text("Queued: waiting for a free worker...")
+    else:
+        st.text(f"Gen {status['gen']+1}: Accuracy {status['accuracy'] or 0:.1f}%")
+    if st.button("Cancel"):
+        service.cancel(job['id'])
+    time.sleep(interval)
+    st.rerun()
+
+
 def main():
     st.set_page_config(layout="wide", page_title="Smart Nutrition System App")
     st.title(" Smart Nutrition System")
     
     # 1. Member 1: Inputs
-    budget, daily_cal, excluded, generations, pop_size = render_sidebar()
+    budget, daily_cal, n_days, excluded, generations, pop_size, engine, seed, ga_options, profile = render_sidebar()
+    plan_budget = round(budget * n_days / 7)  # the sidebar budget is weekly
+
+    params = (budget, daily_cal, n_days, tuple(excluded), generations, pop_size, engine, seed, str(ga_options))
+    service = get_job_service()
 
     if st.sidebar.button("Run Optimization", type="primary"):
         # 2. Member 1: Data
         b_df, l_df, d_df = load_and_filter_data(excluded)
         
         if b_df.empty:
+            st.session_state.pop('result', None)
             st.error("Error: Constraints too strict.")
         else:
-            # 3. Member 3: Engine
-            prog_bar = st.progress(0)
-            status = st.empty()
-            best, history = run_genetic_algorithm(
-                b_df, l_df, d_df, budget, daily_cal*7, pop_size, generations, prog_bar, status
-            )
-            prog_bar.progress(100)
-            status.text("Done!")
-
-            # 4. Member 5: Dashboard
-            st.divider()
-            k1, k2, k3 = st.columns(3)
-            diff_c = best.total_cost - budget
-            diff_k = (best.total_cal/7) - daily_cal
-            
-            k1.metric("Total Cost", f"{best.total_cost} EGP", f"{diff_c:+.0f}", delta_color="inverse")
-            k2.metric("Daily Calories", f"{int(best.total_cal/7)} Kcal", f"{diff_k:+.0f}")
-            k3.metric("AI Accuracy", f"{best.accuracy:.1f}%")
-
-            # Prepare Table
-            rows = []
-            for i, d in enumerate(best.days):
-                rows.append({
-                    "Day": f"Day {i+1}",
-                    "Breakfast": d['Breakfast']['Name'],
-                    "Lunch": d['Lunch']['Name'],
-                    "Dinner": d['Dinner']['Name'],
-                    "Cost": d['Breakfast']['Price'] + d['Lunch']['Price'] + d['Dinner']['Price'],
-                    "Calories": d['Breakfast']['Cal'] + d['Lunch']['Cal'] + d['Dinner']['Cal']
-                })
-            df_res = pd.DataFrame(rows)
-
-            # Tabs
-            t1, t2, t3 = st.tabs([" Schedule", " Analytics", " Export"])
-            with t1: st.dataframe(df_res, use_container_width=True, hide_index=True)
-            with t2:
-                c1, c2 = st.columns(2)
-                c1.pyplot(plot_cost_analysis(best, budget))
-                c2.pyplot(plot_budget_split(best))
-                st.pyplot(plot_learning_curve(history))
-            with t3:
-                excel_io = io.BytesIO()
-                df_res.to_excel(excel_io, index=False); excel_io.seek(0)
-                st.download_button("Excel", excel_io, "Plan.xlsx")
-                st.download_button("PDF", export_pdf(df_res, best.total_cost, best.total_cal), "Plan.pdf")
+            # 3. Member 3: Engine (runs on the shared job service; this session only polls)
+            request = {
+                'budget': plan_budget, 'cal_target': daily_cal*n_days, 'pop_size': pop_size,
+                'generations': generations, 'engine': ENGINE_CHOICES[engine],
+                'seed': seed, 'n_days': n_days, 'excluded': list(excluded), 'profile': profile,
+                'ga_options': ga_options,
+            }
+            previous = st.session_state.get('job')
+            if previous is not None:
+                service.cancel(previous['id'])  # a new run supersedes this session's last one
+            try:
+                job_id = service.submit(request)
+                st.session_state['job'] = {'id': job_id, 'request': request, 'daily_cal': daily_cal,
+                                           'params': params}
+            except RuntimeError as e:
+                st.session_state.pop('job', None)
+                st.error(f"Error: {e}")
+
+    job = st.session_state.get('job')
+    if job is not None:
+        poll_job(service, job)
+
+    # Results live in the session, so downloads and view switches re-render instead of re-running
+    result = st.session_state.get('result')
+    if result is not None:
+        render_result(result, stale=result.params != params)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
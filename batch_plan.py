@@ -0,0 +1,171 @@
+"""
+Headless batch planner: optimizes one plan per person from a targets file.
+
+Input CSV columns (header required):
+    id, budget, daily_cal, excluded[, days]
+where `budget` is weekly, `excluded` lists categories separated by ';' (e.g. "Meat;Seafood")
+and may be empty, and the optional `days` overrides --days (the planning horizon) per person.
+
+Usage:
+    python batch_plan.py employees.csv -o plans.jsonl --workers 8
+    python batch_plan.py employees.csv -o plans.csv --generations 200 --pop-size 150
+    python batch_plan.py patients.csv -o plans.jsonl --days 30
+
+Results are written as soon as each plan finishes (completion order), and at most
+`workers * 4` plans are in flight, so memory stays bounded for any input size.
+Malformed rows and plans that fail are written as records with an `error` field; the rest of
+the batch carries on.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+from app import read_catalog, split_catalog, run_genetic_algorithm, DB_PATH, DEFAULT_DAYS
+
+
+# Worker state: the full catalog, loaded once per process and reused for every person.
+_CATALOG = None
+
+def _init_worker(db_path):
+    global _CATALOG
+    _CATALOG = read_catalog(db_path)
+
+
+def read_targets(path, days=DEFAULT_DAYS):
+    """
+    Yields one target dict per CSV row (lazily, so huge files are never held in memory).
+    A row that fails validation is yielded as-is with an `error` field instead of a plan target.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            target = {
+                'id': row.get('id') or '',
+                'budget': row.get('budget'),
+                'daily_cal': row.get('daily_cal'),
+                'excluded': [c.strip() for c in (row.get('excluded') or '').split(';') if c.strip()],
+                'n_days': row.get('days') or days,
+            }
+            try:
+                target['budget'] = float(target['budget'])
+                target['daily_cal'] = float(target['daily_cal'])
+                target['n_days'] = int(target['n_days'])
+            except (TypeError, ValueError) as e:
+                target['error'] = f"Invalid row: {e}"
+            else:
+                if not (target['budget'] > 0 and target['daily_cal'] > 0 and target['n_days'] > 0):
+                    target['error'] = "Invalid row: budget, daily_cal and days must be positive."
+            yield target
+
+
+def plan_person(target, generations, pop_size):
+    """Worker task: optimizes one person's plan and returns a JSON-ready record."""
+    record = dict(target)
+    b_df, l_df, d_df = split_catalog(_CATALOG, target['excluded'])
+    if b_df.empty or l_df.empty or d_df.empty:
+        record['error'] = "Constraints too strict."
+        return record
+
+    n_days = target['n_days']
+    best, _ = run_genetic_algorithm(
+        b_df, l_df, d_df, target['budget'] * n_days / 7, target['daily_cal'] * n_days, pop_size, generations,
+        vectorized=True, n_days=n_days
+    )
+    record.update({
+        'total_cost': float(best.total_cost),
+        'total_cal': float(best.total_cal),
+        'accuracy': round(float(best.accuracy), 2),
+        'days': [{meal: d[meal]['Name'] for meal in ('Breakfast', 'Lunch', 'Dinner')} for d in best.days],
+    })
+    return record
+
+
+class JsonlWriter:
+    """One JSON object per person."""
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record):
+        self.f.write(json.dumps(record) + "\n")
+
+
+class CsvWriter:
+    """One row per person and day, mirroring the app's schedule table."""
+    FIELDS = ['id', 'budget', 'daily_cal', 'excluded', 'n_days', 'total_cost', 'total_cal', 'accuracy',
+              'Day', 'Breakfast', 'Lunch', 'Dinner', 'error']
+
+    def __init__(self, f):
+        self.writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        base = {k: v for k, v in record.items() if k != 'days'}
+        base['excluded'] = ';'.join(record['excluded'])
+        for i, day in enumerate(record.get('days') or [{}]):
+            self.writer.writerow({**base, **day, 'Day': f"Day {i+1}" if day else ''})
+
+
+def run_batch(targets, out, fmt='jsonl', workers=None, generations=150, pop_size=100, db_path=DB_PATH):
+    """
+    Plans every target on a process pool and streams each record to `out` as it completes.
+    Invalid targets and failed plans are written as error records.
+    Returns (plans, errors): the number of plans and of error records written.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = CsvWriter(out) if fmt == 'csv' else JsonlWriter(out)
+    max_in_flight = workers * 4
+    counts = {'plans': 0, 'errors': 0}
+
+    def write(record):
+        writer.write(record)
+        counts['errors' if 'error' in record else 'plans'] += 1
+
+    def collect(fut, target):
+        try:
+            write(fut.result())
+        except Exception as e:
+            write({**target, 'error': f"{type(e).__name__}: {e}"})
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as pool:
+        pending = {}
+        for target in targets:
+            if 'error' in target:
+                write(target)
+                continue
+            pending[pool.submit(plan_person, target, generations, pop_size)] = target
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    collect(fut, pending.pop(fut))
+        for fut in as_completed(pending):
+            collect(fut, pending[fut])
+    return counts['plans'], counts['errors']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch meal planning for many people.")
+    parser.add_argument("targets", help="CSV with columns id, budget, daily_cal, excluded")
+    parser.add_argument("-o", "--output", default="-", help="Output .jsonl or .csv file ('-' for stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the output file extension")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--generations", type=int, default=150)
+    parser.add_argument("--pop-size", type=int, default=100)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Planning horizon in days")
+    parser.add_argument("--db", default=DB_PATH, help="Meal database path")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        plans, errors = run_batch(read_targets(args.targets, args.days), out, fmt, args.workers, args.generations,
+                                  args.pop_size, args.db)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Success: {plans} plans written, {errors} errors.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
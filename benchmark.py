@@ -0,0 +1,233 @@
+"""
+Benchmark suite for the optimization engine (headless, machine-readable output).
+
+Runs run_genetic_algorithm and WeeklySchedule.calculate_fitness over a grid of
+catalog size x horizon x engine x population size x generations, on the real catalog, on
+synthetic catalogs scaled from create_db.py, or on catalog files it wrote. Each case is one JSON line:
+generations/sec, time to reach --accuracy, peak memory and per-phase timings (setup steps, the
+fitness micro-benchmark and the GA loop phases init / evaluate / sort / reproduce / mutate).
+
+Usage:
+    python benchmark.py                                   # default grid -> stdout
+    python benchmark.py --sizes real,10000,100000 --pop-sizes 100,300 \\
+                        --generations 150,400 --engines object,vectorized -o bench.jsonl
+    python benchmark.py --days 7,30,90 --no-memory        # per-generation cost vs. horizon
+    python create_db.py --synthetic 1000000 -o meals_1m.parquet
+    python benchmark.py --sizes meals_1m.parquet          # loader + engine on a pre-generated catalog
+    python benchmark.py --check-dp                        # DP engine vs. brute force and the GA (exit 1 if worse)
+Compare two engine versions by diffing the JSONL files of the same grid.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app import (read_catalog, split_catalog, run_genetic_algorithm, run_exact_optimizer, evaluate_population,
+                 detect_goal, MealCatalog, MealSampler, WeeklySchedule, MEAL_TYPES, GAObserver, GA_PHASES)
+from create_db import synthesize_catalog, professional_meals
+
+
+def load_catalog(size, seed):
+    """
+    'real' -> the shipped database; an int -> a synthetic catalog of that many items;
+    anything else -> a catalog file (.csv / .parquet / .xlsx).
+    """
+    if size == 'real':
+        return read_catalog()
+    if str(size).isdigit():
+        return synthesize_catalog(int(size), seed=seed)
+    return read_catalog(size)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_fitness(b_df, l_df, d_df, budget, cal_target, pop_size, seed, n_days=7):
+    """Per-individual calculate_fitness cost vs. one vectorized pass over the same population."""
+    catalog, catalog_s = _timed(MealCatalog, b_df, l_df, d_df)
+    goal = detect_goal(cal_target, n_days)
+    sampler, sampler_s = _timed(MealSampler, catalog, seed)
+    genes, init_s = _timed(sampler.draw_genes, goal, pop_size, n_days)
+    population = [WeeklySchedule(b_df, l_df, d_df, goal, catalog.days_from_genes(g), sampler) for g in genes]
+
+    _, object_s = _timed(lambda: [ind.calculate_fitness(budget, cal_target) for ind in population])
+    _, vector_s = _timed(evaluate_population, genes, catalog, budget, cal_target)
+    return {
+        'catalog_build_s': catalog_s,
+        'sampler_build_s': sampler_s,
+        'population_init_s': init_s,
+        'fitness_object_us_per_ind': object_s / pop_size * 1e6,
+        'fitness_vectorized_us_per_ind': vector_s / pop_size * 1e6,
+    }
+
+
+class PhaseTotals(GAObserver):
+    """Sums the per-generation GA phase timings of one run (islands: summed over the workers)."""
+    def __init__(self):
+        self.totals = dict.fromkeys(GA_PHASES, 0.0)
+
+    def on_generation(self, stats):
+        for phase, seconds in stats['phases'].items():
+            self.totals[phase] += seconds
+
+
+ENGINES = {
+    'object': {},
+    'vectorized': {'vectorized': True},
+    'islands': {'islands': max(2, os.cpu_count() or 1)},
+}
+
+def bench_case(frames, engine, pop_size, generations, budget, cal_target, accuracy, seed, memory=True,
+               n_days=7):
+    """
+    One grid point: a full run (throughput, with a PhaseTotals observer for the GA phase timings),
+    a run to the target accuracy and, unless memory=False, a traced run for peak memory (kept
+    separate so tracing does not skew timings). tracemalloc only sees this process, so peak memory
+    is None for the islands engine, whose islands run in worker processes.
+    """
+    def run(**extra):
+        return run_genetic_algorithm(*frames, budget, cal_target, pop_size, generations, seed=seed,
+                                     n_days=n_days, **ENGINES[engine], **extra)
+
+    phases = PhaseTotals()
+    (best, history), wall_s = _timed(run, observers=[phases])
+    target, _ = run(target_accuracy=accuracy)
+
+    peak = None
+    if memory and engine != 'islands':
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return {
+        'wall_s': wall_s,
+        'generations_per_s': len(history) / wall_s if wall_s else None,
+        'accuracy': float(best.accuracy),
+        f'time_to_{accuracy:g}pct_s': target.execution_time if target.stop_reason == 'target_accuracy' else None,
+        'generations_to_target': target.stopped_at if target.stop_reason == 'target_accuracy' else None,
+        'peak_mem_mb': peak,
+        'phases': {f'ga_{phase}_s': seconds for phase, seconds in phases.totals.items()},
+    }
+
+
+def run_benchmarks(sizes, engines, pop_sizes, generations, budget=3000, daily_cal=2500, accuracy=99.0,
+                   seed=0, memory=True, out=sys.stdout, days=(7,)):
+    """Runs the whole grid, writing one JSON record per case as soon as it finishes (budget is weekly)."""
+    env = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+           'cpus': os.cpu_count()}
+    for size in sizes:
+        (df, load_s) = _timed(load_catalog, size, seed)
+        frames, split_s = _timed(split_catalog, df, [])
+        for n_days in days:
+            plan_budget, cal_target = budget * n_days / 7, daily_cal * n_days
+            fitness = bench_fitness(*frames, plan_budget, cal_target, max(pop_sizes), seed, n_days)
+            for engine, pop_size, n_gen in itertools.product(engines, pop_sizes, generations):
+                case = bench_case(frames, engine, pop_size, n_gen, plan_budget, cal_target, accuracy, seed, memory,
+                                  n_days)
+                record = {
+                    'catalog': size, 'n_items': len(df), 'days': n_days, 'engine': engine, 'pop_size': pop_size,
+                    'generations': n_gen, 'seed': seed, 'budget': budget, 'daily_cal': daily_cal, **case,
+                    'phases': {'load_s': load_s, 'split_s': split_s, **fitness, **case['phases']},
+                    'env': env,
+                }
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+
+def check_dp(n_small=40, seed=0, out=sys.stdout):
+    """
+    Checks the DP engine (engine='exact') two ways, one JSON record per case:
+    - against brute force over every plan of small catalogs sampled from the curated one
+      (2-4 days, 18-36 distinct days), where it must reach the optimum;
+    - against the vectorized GA (150 generations, seed 0) on the real catalog over a grid of
+      exclusions x weekly budgets x daily calories, where it must not be worse.
+    Returns the number of failed cases.
+    """
+    failed = 0
+
+    def report(record):
+        nonlocal failed
+        failed += not record['ok']
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    base = professional_meals()
+    rng = np.random.default_rng(seed)
+    for _ in range(n_small):
+        n_days = int(rng.integers(2, 5))
+        sizes = (3, 4, 3) if n_days < 4 else (2, 3, 2)
+        frames = tuple(base[base['Type'] == meal].sample(k, random_state=int(rng.integers(1 << 30)))
+                       for meal, k in zip(MEAL_TYPES, sizes))
+        days = np.array(list(itertools.product(*(range(k) for k in sizes))))
+        plans = days[np.array(list(itertools.product(range(len(days)), repeat=n_days)))]
+        plans = plans.reshape(len(plans), -1)
+        budget, cal_target = float(rng.integers(20, 80) * 10 * n_days), float(rng.integers(30, 70) * 50 * n_days)
+        fitness, _, _ = evaluate_population(plans, MealCatalog(*frames), budget, cal_target)
+        dp, _ = run_exact_optimizer(*frames, budget, cal_target, n_days=n_days)
+        optimum = 100 * (1 + float(fitness.max()))
+        report({'check': 'brute_force', 'days': n_days, 'budget': budget, 'cal_target': cal_target,
+                'dp_accuracy': float(dp.accuracy), 'optimum_accuracy': optimum,
+                'ok': bool(dp.accuracy >= optimum - 1e-9)})
+
+    df = read_catalog()
+    for excluded, budget, daily_cal in itertools.product(([], ['Meat'], ['Meat', 'Chicken']), (1500, 3000, 6000),
+                                                         (1500, 2500, 3500)):
+        frames = split_catalog(df, excluded)
+        (dp, _), dp_s = _timed(run_exact_optimizer, *frames, budget, daily_cal * 7)
+        (ga, _), ga_s = _timed(run_genetic_algorithm, *frames, budget, daily_cal * 7, 100, 150,
+                               vectorized=True, seed=0)
+        report({'check': 'ga', 'excluded': excluded, 'budget': budget, 'daily_cal': daily_cal,
+                'dp_accuracy': float(dp.accuracy), 'dp_repeats': int(dp.lunch_repeats), 'dp_s': dp_s,
+                'ga_accuracy': float(ga.accuracy), 'ga_s': ga_s, 'ok': bool(dp.accuracy >= ga.accuracy - 1e-9)})
+    return failed
+
+
+def _csv(cast):
+    return lambda text: [cast(v) for v in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the meal-planning engine.")
+    parser.add_argument("--sizes", type=_csv(str), default=['real', '10000'],
+                        help="Catalogs: 'real', synthetic item counts and/or catalog files "
+                             "(e.g. real,10000,meals.parquet)")
+    parser.add_argument("--engines", type=_csv(str), default=['object', 'vectorized'],
+                        help=", ".join(ENGINES))
+    parser.add_argument("--pop-sizes", type=_csv(int), default=[100, 300])
+    parser.add_argument("--generations", type=_csv(int), default=[150])
+    parser.add_argument("--days", type=_csv(int), default=[7], help="Planning horizons (e.g. 7,30,90)")
+    parser.add_argument("--budget", type=float, default=3000, help="Weekly budget")
+    parser.add_argument("--daily-cal", type=float, default=2500)
+    parser.add_argument("--accuracy", type=float, default=99.0, help="Target for time-to-accuracy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced peak-memory run")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--check-dp", action="store_true",
+                        help="Check the DP engine against brute force and the GA instead (see check_dp)")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        if args.check_dp:
+            failed = check_dp(seed=args.seed, out=out)
+            print(f"DP check: {failed} failed case(s).", file=sys.stderr)
+            sys.exit(1 if failed else 0)
+        run_benchmarks(args.sizes, args.engines, args.pop_sizes, args.generations, args.budget,
+                       args.daily_cal, args.accuracy, args.seed, not args.no_memory, out, args.days)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
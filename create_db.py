@@ -1,6 +1,27 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
 import pandas as pd
 
-def create_professional_database():
+def compile_catalog(df, path):
+    """
+    Writes the compiled columnar catalog read by the app (app.read_compiled_catalog):
+    Name/Cal/Price as plain arrays, Type/Category as int codes + label arrays.
+    """
+    types = pd.Categorical(df['Type'])
+    categories = pd.Categorical(df['Category'])
+    np.savez(
+        path,
+        name=df['Name'].to_numpy(dtype=str),
+        type_codes=types.codes, type_labels=types.categories.to_numpy(dtype=str),
+        category_codes=categories.codes, category_labels=categories.categories.to_numpy(dtype=str),
+        cal=df['Cal'].to_numpy(), price=df['Price'].to_numpy(),
+    )
+
+def professional_meals():
     """
     Generates a massive, diverse database (~120+ items) with high variance.
     Graduated Scales:
@@ -122,15 +143,164 @@ def create_professional_database():
         {"Name": "Pizza Slice (Pepperoni)", "Type": "Dinner", "Category": "Meat", "Cal": 700, "Price": 50},
         {"Name": "Whole Pizza (Small)", "Type": "Dinner", "Category": "Vegetarian", "Cal": 1200, "Price": 120},
     ]
+    return pd.DataFrame(data)
+
+SYNTH_CHUNK = 100_000
+
+def iter_synthetic_catalog(n_items, seed=0, chunk_size=SYNTH_CHUNK):
+    """
+    Streams a deterministic synthetic catalog of n_items meals as DataFrames of chunk_size rows.
+    Each item clones a random curated meal (same Type/Category) with Cal/Price jittered by +-25%,
+    so the Type/Category mix and the Cal/Price spread follow the curated catalog.
+    Chunk i draws from its own stream seeded by (seed, i): the same seed and chunk_size give the
+    same catalog, and only one chunk is ever in memory.
+    """
+    base = professional_meals()
+    names = base['Name'].to_numpy(dtype=object)
+    types, categories = pd.Categorical(base['Type']), pd.Categorical(base['Category'])
+    cal, price = base['Cal'].to_numpy(), base['Price'].to_numpy()
+    for i, start in enumerate(range(0, n_items, chunk_size)):
+        n = min(chunk_size, n_items - start)
+        rng = np.random.default_rng([seed, i])
+        pick = rng.integers(0, len(base), n)
+        yield pd.DataFrame({
+            'Name': names[pick] + " #" + np.arange(start, start + n).astype(str).astype(object),
+            'Type': types[pick],
+            'Category': categories[pick],
+            'Cal': np.maximum(50, np.rint(cal[pick] * rng.uniform(0.75, 1.25, n))).astype(int),
+            'Price': np.maximum(5, np.rint(price[pick] * rng.uniform(0.75, 1.25, n))).astype(int),
+        }, index=pd.RangeIndex(start, start + n))
+
+def synthesize_catalog(n_items, seed=0):
+    """Deterministic synthetic catalog of n_items meals, in memory (for benchmarks)."""
+    return pd.concat(iter_synthetic_catalog(n_items, seed), ignore_index=True)
+
+
+class CatalogStats:
+    """Running summary of a streamed catalog: item counts per Type/Category and Cal/Price ranges."""
+    def __init__(self):
+        self.n_items = 0
+        self.chunks = 0
+        self.by_type = {}
+        self.by_category = {}
+        self.columns = {col: {'min': np.inf, 'max': -np.inf, 'sum': 0} for col in ('Cal', 'Price')}
+
+    def update(self, chunk):
+        self.n_items += len(chunk)
+        self.chunks += 1
+        for counts, col in ((self.by_type, 'Type'), (self.by_category, 'Category')):
+            for key, n in chunk[col].value_counts(sort=False).items():
+                counts[key] = counts.get(key, 0) + int(n)
+        for col, agg in self.columns.items():
+            values = chunk[col].to_numpy()
+            agg['min'] = min(agg['min'], values.min())
+            agg['max'] = max(agg['max'], values.max())
+            agg['sum'] += int(values.sum())
+
+    def summary(self):
+        return {
+            'n_items': self.n_items, 'chunks': self.chunks,
+            'by_type': self.by_type, 'by_category': self.by_category,
+            **{col.lower(): {'min': int(agg['min']), 'max': int(agg['max']), 'mean': agg['sum'] / self.n_items}
+               for col, agg in self.columns.items() if self.n_items},
+        }
+
+
+class CsvChunkWriter:
+    """Appends chunks to one CSV file (header from the first chunk)."""
+    def __init__(self, path):
+        self.f = open(path, 'w', newline='', encoding='utf-8')
+        self.header = True
 
+    def write(self, chunk):
+        chunk.to_csv(self.f, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetChunkWriter:
+    """Writes every chunk as one row group of a Parquet file (needs pyarrow)."""
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow); use a .csv path instead.")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, chunk):
+        table = self.pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+CHUNK_WRITERS = {'.csv': CsvChunkWriter, '.parquet': ParquetChunkWriter}
+
+def write_synthetic_catalog(path, n_items, seed=0, chunk_size=SYNTH_CHUNK):
+    """
+    Streams a synthetic catalog of n_items to a .csv or .parquet file, one chunk at a time,
+    and returns its summary stats (counts, Cal/Price ranges, seed, size on disk, timing).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if n_items < 1 or chunk_size < 1:
+        raise ValueError("n_items and chunk_size must be at least 1")
+    if ext not in CHUNK_WRITERS:
+        raise ValueError(f"Unsupported output {path!r}: use one of {', '.join(CHUNK_WRITERS)}")
+    start = time.perf_counter()
+    stats = CatalogStats()
+    writer = CHUNK_WRITERS[ext](path)
+    try:
+        for chunk in iter_synthetic_catalog(n_items, seed, chunk_size):
+            writer.write(chunk)
+            stats.update(chunk)
+    finally:
+        writer.close()
+    return {
+        'path': path, 'seed': seed, 'chunk_size': chunk_size, **stats.summary(),
+        'bytes': os.path.getsize(path), 'seconds': round(time.perf_counter() - start, 3),
+    }
+
+def create_professional_database():
+    """Writes the curated catalog to Excel, plus its compiled .npz twin for the app."""
     # Create DataFrame and Export
-    df = pd.DataFrame(data)
+    df = professional_meals()
     file_name = "Smart_System_db.xlsx"
     df.to_excel(file_name, index=False)
+    compile_catalog(df, "Smart_System_db.npz")
     
     print(f"Success: Database generated with {len(df)} unique items.")
     print(f"Calorie Range: {df['Cal'].min()} - {df['Cal'].max()} Kcal")
     print(f"Price Range: {df['Price'].min()} - {df['Price'].max()} EGP")
 
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the meal database, or a synthetic catalog of any size.")
+    parser.add_argument("--synthetic", type=_positive_int, metavar="N_ITEMS",
+                        help="Stream N_ITEMS synthetic meals to --output instead of writing the curated database")
+    parser.add_argument("-o", "--output", default="synthetic_catalog.parquet",
+                        help="Synthetic output (.csv or .parquet)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=_positive_int, default=SYNTH_CHUNK, help="Rows generated and written per chunk")
+    args = parser.parse_args(argv)
+
+    if args.synthetic is None:
+        create_professional_database()
+    else:
+        print(json.dumps(write_synthetic_catalog(args.output, args.synthetic, args.seed, args.chunk_size), indent=2))
+
 if __name__ == "__main__":
-    create_professional_database()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""
+Local job service: plan requests run on a bounded process pool instead of the caller's thread.
+
+Used in-process by the Streamlit app (one shared JobService per server process), or
+served over HTTP for other clients:
+    python job_service.py --port 8765 --workers 4
+
+HTTP API (JSON):
+    POST   /jobs                 submit a request (see run_job)   -> 202 {"id": ...}
+    GET    /jobs                 summaries of all known jobs
+    GET    /jobs/<id>?since=N    status, progress and the history entries from index N on
+    GET    /jobs/<id>/result     result of a finished job (409 while it is still running)
+    DELETE /jobs/<id>            cancel a queued or running job
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from app import (read_catalog, split_catalog, optimize_plan, detect_goal, MealCatalog, MealSampler, GAObserver,
+                 ProfilingObserver, ResultCache, WarmStartStore, DB_PATH)
+
+
+# Worker state: the full catalog and its warm-start store, loaded once per process and reused for every job.
+_CATALOG = None
+_WARM_START = None
+
+def _init_worker(db_path):
+    global _CATALOG, _WARM_START
+    _CATALOG = read_catalog(db_path)
+    _WARM_START = WarmStartStore(_CATALOG)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled while running."""
+
+
+class _JobReporter(GAObserver):
+    """Worker-side sink: batches best-fitness history to the service and honours cancellation."""
+    def __init__(self, job_id, events, cancel, interval=0.25):
+        self.job_id = job_id
+        self.events = events
+        self.cancel = cancel
+        self.interval = interval
+        self._pending = []
+        self._last = time.perf_counter()
+
+    def on_generation(self, stats):
+        self._pending.append(stats['best_fitness'])
+        now = time.perf_counter()
+        if now - self._last < self.interval and stats['gen'] + 1 < stats['generations']:
+            return
+        self._last = now
+        self.events.put((self.job_id, 'progress', {
+            'gen': stats['gen'], 'generations': stats['generations'],
+            'accuracy': stats['best_accuracy'], 'history': self._pending,
+        }))
+        self._pending = []
+        if self.cancel.get(self.job_id):
+            raise JobCancelled(self.job_id)
+
+
+def run_job(job_id, request, events, cancel):
+    """
+    Worker task for one plan request: the optimize_plan keyword arguments (budget, cal_target,
+    pop_size, generations, engine, seed, n_days) plus `excluded` categories, `ga_options` (including
+    warm_fraction) and `profile`. Islands run in this worker process, one after another, so a job
+    never uses more than its one slot of the pool. Returns a picklable result: the best plan's genes,
+    metrics, history and profile (and in Pareto mode the genes of every front plan, with the index
+    of the best one).
+    """
+    events.put((job_id, 'running', {'started': time.time()}))
+    request = dict(request)
+    b_df, l_df, d_df = split_catalog(_CATALOG, request.pop('excluded', []))
+    if b_df.empty or l_df.empty or d_df.empty:
+        raise ValueError("Constraints too strict.")
+    profiler = ProfilingObserver() if request.pop('profile', False) else None
+    ga_options = request.pop('ga_options', {})
+    if ga_options.get('islands', 1) > 1:
+        # This is already one of the service's max_workers processes: no nested island pool
+        ga_options = {**ga_options, 'islands_in_process': True}
+    try:
+        best, history = optimize_plan(
+            b_df, l_df, d_df, cache=None if profiler else ResultCache(), warm_start=_WARM_START,
+            observers=[_JobReporter(job_id, events, cancel), profiler], **request, **ga_options
+        )
+    finally:
+        # A cancelled or failed run never reaches on_finish; the pool worker outlives the job
+        if profiler is not None:
+            profiler.close()
+    catalog = MealCatalog(b_df, l_df, d_df)
+    front = getattr(best, 'front', None)
+    return {
+        'genes': catalog.genes_from_schedule(best).tolist(),
+        'front': [catalog.genes_from_schedule(plan).tolist() for plan in front] if front else None,
+        'front_best': front.index(best) if front else None,
+        'history': [float(h) for h in history],
+        'total_cost': float(best.total_cost), 'total_cal': float(best.total_cal),
+        'accuracy': float(best.accuracy), 'fitness': float(best.fitness),
+        'stop_reason': best.stop_reason, 'stopped_at': best.stopped_at,
+        'execution_time': best.execution_time, 'engine': getattr(best, 'engine', 'ga'), 'cached': best.cached,
+        'warm_started': getattr(best, 'warm_started', 0),
+        'profile': None if profiler is None else {'report': profiler.report,
+                                                   'peak_memory_mb': profiler.peak_memory_mb},
+    }
+
+
+class JobService:
+    """
+    Local job queue for plan requests (see run_job for the request format).
+    At most max_workers plans run at once on a process pool and at most max_queued wait;
+    workers stream progress over a queue that a pump thread folds into the job records.
+    Callers poll status(job_id, since) for state, progress and new history, and can
+    cancel() or fetch result(). The oldest finished jobs are forgotten beyond max_jobs.
+    Job lifecycle: queued -> running -> done | failed | cancelled.
+    """
+    FINISHED = ('done', 'failed', 'cancelled')
+    REQUIRED = ('budget', 'cal_target', 'pop_size', 'generations')
+
+    def __init__(self, max_workers=None, max_queued=64, max_jobs=500, db_path=DB_PATH):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.max_jobs = max_jobs
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._cancel = self._manager.dict()
+        self._pool = ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(db_path,))
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._pump_thread = threading.Thread(target=self._pump, daemon=True)
+        self._pump_thread.start()
+
+    def submit(self, request):
+        """
+        Queues a plan request; returns its job id. Raises ValueError for an incomplete request
+        and RuntimeError when the queue is full.
+        """
+        missing = [k for k in self.REQUIRED if k not in request]
+        if missing:
+            raise ValueError(f"Missing request fields: {', '.join(missing)}")
+        with self._lock:
+            if sum(job['status'] == 'queued' for job in self._jobs.values()) >= self.max_queued:
+                raise RuntimeError("Job queue is full, try again later.")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id, 'status': 'queued', 'request': request, 'gen': 0,
+                'generations': request.get('generations'), 'progress': 0.0, 'accuracy': None,
+                'history': [], 'error': None, 'submitted': time.time(), 'started': None, 'finished': None,
+            }
+            self._evict()
+        future = self._pool.submit(run_job, job_id, request, self._events, self._cancel)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def status(self, job_id, since=0):
+        """Job record without the result; `history` holds the entries from index `since` on."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**{k: v for k, v in job.items() if k != 'result'}, 'history': job['history'][since:],
+                    'history_len': len(job['history'])}
+
+    def jobs(self):
+        """Summaries of every known job, oldest first."""
+        with self._lock:
+            return [{k: job[k] for k in ('id', 'status', 'progress', 'accuracy', 'submitted', 'finished')}
+                    for job in self._jobs.values()]
+
+    def result(self, job_id):
+        """The run_job result of a finished job, else None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.get('result') if job else None
+
+    def schedule(self, job_id, b_df, l_df, d_df):
+        """
+        Rebuilds a finished job's best WeeklySchedule (with its .front in Pareto mode)
+        against its (same) filtered catalog.
+        """
+        result, request = self.result(job_id), self._jobs[job_id]['request']
+        catalog = MealCatalog(b_df, l_df, d_df)
+        sampler = MealSampler(catalog)
+        goal = detect_goal(request['cal_target'], len(result['genes']) // 3)
+        plans = [catalog.schedule_from_genes(genes, goal_type=goal, sampler=sampler)
+                 for genes in result['front'] or [result['genes']]]
+        for plan in plans:
+            plan.calculate_fitness(request['budget'], request['cal_target'])
+        best = plans[result['front_best'] or 0]
+        if result['front']:
+            best.front = plans
+        for attr in ('stop_reason', 'stopped_at', 'execution_time', 'engine', 'cached'):
+            setattr(best, attr, result[attr])
+        return best
+
+    def cancel(self, job_id):
+        """Cancels a queued job at once, or asks a running one to stop at its next report."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is None or future.done():
+            return False
+        if not future.cancel():
+            self._cancel[job_id] = True
+        return True
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            job_ids = list(self._futures)
+        for job_id in job_ids:
+            self.cancel(job_id)
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._events.put(None)
+        self._pump_thread.join()
+        self._manager.shutdown()
+
+    def _pump(self):
+        while True:
+            try:
+                event = self._events.get()
+            except (EOFError, OSError):  # manager gone (interpreter exit)
+                return
+            if event is None:
+                return
+            job_id, kind, data = event
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in self.FINISHED:
+                    continue
+                if kind == 'running':
+                    job.update(status='running', **data)
+                else:
+                    job['history'].extend(data['history'])
+                    job.update(gen=data['gen'], generations=data['generations'], accuracy=data['accuracy'],
+                               progress=min(1.0, (data['gen'] + 1) / data['generations']))
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            self._cancel.pop(job_id, None)
+            if job is None:
+                return
+            job['finished'] = time.time()
+            if future.cancelled() or isinstance(future.exception(), JobCancelled):
+                job['status'] = 'cancelled'
+            elif future.exception() is not None:
+                job.update(status='failed', error=str(future.exception()))
+            else:
+                result = future.result()
+                job.update(status='done', result=result, history=result['history'], progress=1.0,
+                           accuracy=result['accuracy'])
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in self.FINISHED]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """JSON front end over a JobService (set as the `service` class attribute)."""
+    service = None
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if not parts or parts[0] != 'jobs' or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'result'):
+            return None, None, url
+        return (parts[1] if len(parts) > 1 else None), (len(parts) == 3), url
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/jobs':
+            return self._send(404, {'error': 'not found'})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            job_id = self.service.submit(request)
+        except (ValueError, TypeError) as e:
+            return self._send(400, {'error': str(e)})
+        except RuntimeError as e:
+            return self._send(503, {'error': str(e)})
+        self._send(202, {'id': job_id})
+
+    def do_GET(self):
+        job_id, want_result, url = self._route()
+        if url.path.rstrip('/') == '/jobs':
+            return self._send(200, self.service.jobs())
+        since = int(parse_qs(url.query).get('since', ['0'])[0])
+        status = self.service.status(job_id, since) if job_id else None
+        if status is None:
+            return self._send(404, {'error': 'unknown job'})
+        if not want_result:
+            return self._send(200, status)
+        if status['status'] != 'done':
+            return self._send(409, {'error': f"job is {status['status']}", 'status': status['status']})
+        self._send(200, self.service.result(job_id))
+
+    def do_DELETE(self):
+        job_id, want_result, _ = self._route()
+        if not job_id or want_result or self.service.status(job_id) is None:
+            return self._send(404, {'error': 'unknown job'})
+        self._send(200, {'id': job_id, 'cancelled': self.service.cancel(job_id)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP job service for meal planning.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent plans (default: CPU count)")
+    parser.add_argument("--max-queued", type=int, default=64, help="Waiting jobs before submits are refused")
+    parser.add_argument("--db", default=DB_PATH, help="Meal database path")
+    args = parser.parse_args(argv)
+
+    JobHandler.service = JobService(args.workers, args.max_queued, db_path=args.db)
+    server = ThreadingHTTPServer((args.host, args.port), JobHandler)
+    print(f"Job service on http://{args.host}:{args.port}/jobs", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        JobHandler.service.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()